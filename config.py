@@ -25,6 +25,11 @@ FILTRO_GAUSSIANO_SIGMA = 1.0
 FOURIER_FILTRO_CUTOFF_DEFAULT = 0.2
 FOURIER_FILTRO_ORDEN_DEFAULT = 2
 
+# Backend FFT: 'scipy', 'numpy' o 'pyfftw' (sobrescribible con PDI_FFT_BACKEND)
+FFT_BACKEND = 'scipy'
+FFT_WORKERS = -1                  # -1 = todos los núcleos (PDI_FFT_WORKERS)
+FFT_PRECISION = 'double'          # 'double' o 'single' (PDI_FFT_PRECISION)
+
 # Configuración de DCT
 DCT_Q_FACTOR_DEFAULT = 0.5
 DCT_BLOCK_SIZE = 8
@@ -4,5 +4,8 @@ Módulo de Transformadas de Fourier y DCT
 
 from .transformada_fourier import TransformadaFourier
 from .transformada_dct import TransformadaDCT
+from .codificacion_entropia import CodificadorEntropia
+from .backend_fft import BackendFFT
+from .flujo_fourier import FlujoFourier
 
-__all__ = ['TransformadaFourier', 'TransformadaDCT']
+__all__ = ['TransformadaFourier', 'TransformadaDCT', 'CodificadorEntropia', 'BackendFFT', 'FlujoFourier']
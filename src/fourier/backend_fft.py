@@ -0,0 +1,190 @@
+"""
+Módulo de backends FFT
+Permite elegir entre numpy, scipy.fft (multihilo) y pyFFTW si está instalado
+"""
+
+import os
+import numpy as np
+from typing import Callable, Optional, Tuple
+from config import FFT_BACKEND, FFT_WORKERS, FFT_PRECISION
+
+try:
+    import scipy.fft as _scipy_fft
+except ImportError:
+    _scipy_fft = None
+
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft as _pyfftw_fft
+    pyfftw.interfaces.cache.enable()
+except ImportError:
+    pyfftw = None
+    _pyfftw_fft = None
+
+
+class BackendFFT:
+    """
+    Envoltorio común para las FFT 2D usadas por el paquete de Fourier.
+    
+    El backend, el número de hilos y la precisión se toman de los argumentos,
+    de las variables de entorno PDI_FFT_BACKEND, PDI_FFT_WORKERS y
+    PDI_FFT_PRECISION, o de config.py, en ese orden. Si el backend pedido no
+    está disponible se usa el siguiente de la lista pyfftw -> scipy -> numpy.
+    """
+    
+    BACKENDS = ('pyfftw', 'scipy', 'numpy')
+    PRECISIONES = ('double', 'single')
+    
+    _por_defecto = None
+    
+    def __init__(self, nombre: Optional[str] = None, workers: Optional[int] = None,
+                 precision: Optional[str] = None):
+        """
+        Inicializa el backend.
+        
+        Args:
+            nombre: 'numpy', 'scipy' o 'pyfftw'
+            workers: Hilos para scipy/pyfftw (-1 = todos los núcleos)
+            precision: 'double' (complex128) o 'single' (complex64)
+        """
+        if nombre is None:
+            nombre = os.environ.get('PDI_FFT_BACKEND', FFT_BACKEND)
+        if workers is None:
+            workers = int(os.environ.get('PDI_FFT_WORKERS', FFT_WORKERS))
+        if precision is None:
+            precision = os.environ.get('PDI_FFT_PRECISION', FFT_PRECISION)
+        
+        nombre = nombre.lower()
+        if nombre not in self.BACKENDS:
+            raise ValueError(f'Backend FFT desconocido: {nombre}')
+        if precision not in self.PRECISIONES:
+            raise ValueError(f'Precisión desconocida: {precision}')
+        
+        self.nombre = self._resolver(nombre)
+        self.workers = workers
+        self.precision = precision
+        
+        if self.nombre == 'pyfftw':
+            self._modulo = _pyfftw_fft
+        elif self.nombre == 'scipy':
+            self._modulo = _scipy_fft
+        else:
+            self._modulo = np.fft
+    
+    @classmethod
+    def por_defecto(cls) -> 'BackendFFT':
+        """Devuelve el backend por defecto (configuración/entorno), creado una sola vez."""
+        if cls._por_defecto is None:
+            cls._por_defecto = cls()
+        return cls._por_defecto
+    
+    @staticmethod
+    def _resolver(nombre: str) -> str:
+        """Devuelve el primer backend disponible a partir del solicitado."""
+        disponibles = {
+            'pyfftw': _pyfftw_fft is not None,
+            'scipy': _scipy_fft is not None,
+            'numpy': True
+        }
+        for candidato in BackendFFT.BACKENDS[BackendFFT.BACKENDS.index(nombre):]:
+            if disponibles[candidato]:
+                return candidato
+        return 'numpy'
+    
+    @property
+    def dtype_real(self) -> type:
+        """Tipo real de trabajo según la precisión."""
+        return np.float32 if self.precision == 'single' else np.float64
+    
+    @property
+    def dtype_complejo(self) -> type:
+        """Tipo complejo de trabajo según la precisión."""
+        return np.complex64 if self.precision == 'single' else np.complex128
+    
+    def _kwargs(self) -> dict:
+        """Argumentos de paralelismo para el backend activo."""
+        return {} if self.nombre == 'numpy' else {'workers': self.workers}
+    
+    def _real(self, x: np.ndarray) -> np.ndarray:
+        """Convierte a la precisión real de trabajo sin copiar si ya coincide."""
+        return np.asarray(x).astype(self.dtype_real, copy=False)
+    
+    def _complejo(self, x: np.ndarray) -> np.ndarray:
+        """Convierte a la precisión compleja de trabajo sin copiar si ya coincide."""
+        return np.asarray(x).astype(self.dtype_complejo, copy=False)
+    
+    def fft2(self, x: np.ndarray) -> np.ndarray:
+        """FFT 2D completa."""
+        if np.iscomplexobj(x):
+            return self._modulo.fft2(self._complejo(x), **self._kwargs())
+        return self._modulo.fft2(self._real(x), **self._kwargs())
+    
+    def ifft2(self, X: np.ndarray) -> np.ndarray:
+        """FFT 2D inversa completa."""
+        return self._modulo.ifft2(self._complejo(X), **self._kwargs())
+    
+    def rfft2(self, x: np.ndarray) -> np.ndarray:
+        """FFT 2D de entrada real (medio plano de columnas)."""
+        return self._modulo.rfft2(self._real(x), **self._kwargs())
+    
+    def irfft2(self, X: np.ndarray, s: Tuple[int, int]) -> np.ndarray:
+        """FFT 2D inversa con salida real de forma s."""
+        return self._modulo.irfft2(self._complejo(X), s=s, **self._kwargs())
+    
+    def plan_real(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Callable, Callable]:
+        """
+        Prepara un par rfft2/irfft2 con buffers fijos para una forma dada.
+        
+        Con pyfftw se crean planes FFTW que leen y escriben directamente en
+        los buffers, sin reservar memoria por llamada. Con scipy/numpy el
+        resultado de cada transformada se copia al buffer correspondiente.
+        
+        Args:
+            shape: Forma de la imagen real (filas, columnas)
+            
+        Returns:
+            entrada: Buffer real de entrada
+            espectro: Buffer complejo (filas, columnas // 2 + 1)
+            salida: Buffer real de salida
+            directa: Función sin argumentos entrada -> espectro
+            inversa: Función sin argumentos espectro -> salida (destruye espectro)
+        """
+        rows, cols = int(shape[0]), int(shape[1])
+        shape_espectro = (rows, cols // 2 + 1)
+        
+        if self.nombre == 'pyfftw':
+            hilos = os.cpu_count() if self.workers < 0 else max(self.workers, 1)
+            entrada = pyfftw.empty_aligned((rows, cols), dtype=self.dtype_real)
+            espectro = pyfftw.empty_aligned(shape_espectro, dtype=self.dtype_complejo)
+            salida = pyfftw.empty_aligned((rows, cols), dtype=self.dtype_real)
+            directa = pyfftw.FFTW(entrada, espectro, axes=(0, 1), direction='FFTW_FORWARD',
+                                  flags=('FFTW_MEASURE',), threads=hilos)
+            inversa = pyfftw.FFTW(espectro, salida, axes=(0, 1), direction='FFTW_BACKWARD',
+                                  flags=('FFTW_MEASURE', 'FFTW_DESTROY_INPUT'), threads=hilos)
+            return entrada, espectro, salida, directa, inversa
+        
+        entrada = np.zeros((rows, cols), dtype=self.dtype_real)
+        espectro = np.zeros(shape_espectro, dtype=self.dtype_complejo)
+        salida = np.zeros((rows, cols), dtype=self.dtype_real)
+        
+        def directa():
+            np.copyto(espectro, self.rfft2(entrada))
+        
+        def inversa():
+            np.copyto(salida, self.irfft2(espectro, s=(rows, cols)))
+        
+        return entrada, espectro, salida, directa, inversa
+    
+    @staticmethod
+    def fftshift(x: np.ndarray) -> np.ndarray:
+        """Centra la frecuencia cero."""
+        return np.fft.fftshift(x)
+    
+    @staticmethod
+    def ifftshift(x: np.ndarray) -> np.ndarray:
+        """Deshace fftshift."""
+        return np.fft.ifftshift(x)
+    
+    def __repr__(self) -> str:
+        return f'BackendFFT(nombre={self.nombre!r}, workers={self.workers}, precision={self.precision!r})'
+
@@ -0,0 +1,338 @@
+"""
+Módulo de codificación entrópica para coeficientes DCT
+Implementa zigzag, run-length y Huffman canónico vectorizados por bloques
+"""
+
+import heapq
+import struct
+import numpy as np
+from functools import lru_cache
+from typing import Tuple
+
+
+class CodificadorEntropia:
+    """
+    Codificador entrópico estilo JPEG para bloques de coeficientes cuantizados.
+    
+    Cada bloque se recorre en zigzag y se emite como una secuencia de tokens:
+    el DC diferencial, un token (run, size) por cada coeficiente AC no nulo y
+    un EOB si el bloque termina en ceros. Los símbolos se codifican con una
+    tabla Huffman canónica propia de la imagen y cada token lleva a
+    continuación los bits de amplitud del coeficiente.
+    
+    El flujo se divide en segmentos de bloques consecutivos cuya longitud en
+    bits se guarda en la cabecera, de modo que el decodificador avanza todos
+    los segmentos a la vez, token a token, con operaciones vectorizadas.
+    """
+    
+    # Bits reservados para la categoría de tamaño dentro de un símbolo
+    BITS_TAMANO = 5
+    MAX_TAMANO = (1 << BITS_TAMANO) - 1
+    MAX_LONGITUD_CODIGO = 16
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def orden_zigzag(N: int = 8) -> np.ndarray:
+        """
+        Calcula el orden zigzag de un bloque NxN.
+        
+        Args:
+            N: Tamaño del bloque
+        
+        Returns:
+            Índices planos (fila*N + columna) en orden zigzag
+        """
+        indices = [(i, j) for i in range(N) for j in range(N)]
+        indices.sort(key=lambda ij: (ij[0] + ij[1], ij[0] if (ij[0] + ij[1]) % 2 else -ij[0]))
+        orden = np.array([i * N + j for i, j in indices], dtype=np.intp)
+        orden.flags.writeable = False
+        return orden
+    
+    @staticmethod
+    def _categoria(valores: np.ndarray) -> np.ndarray:
+        """Número de bits necesarios para la magnitud de cada valor (0 para 0)."""
+        return np.frexp(np.abs(valores).astype(np.float64))[1].astype(np.int64)
+    
+    @staticmethod
+    def longitudes_huffman(frecuencias: np.ndarray, max_longitud: int = 16) -> np.ndarray:
+        """
+        Calcula longitudes de código Huffman limitadas a max_longitud bits.
+        
+        Args:
+            frecuencias: Frecuencia de cada símbolo
+            max_longitud: Longitud máxima de código permitida
+        
+        Returns:
+            Longitud de código por símbolo (0 para símbolos no usados)
+        """
+        frecuencias = np.asarray(frecuencias, dtype=np.int64).copy()
+        longitudes = np.zeros(len(frecuencias), dtype=np.int64)
+        usados = np.flatnonzero(frecuencias)
+        
+        if len(usados) == 0:
+            return longitudes
+        if len(usados) == 1:
+            longitudes[usados] = 1
+            return longitudes
+        
+        while True:
+            heap = [(int(frecuencias[s]), int(s), (int(s),)) for s in usados]
+            heapq.heapify(heap)
+            profundidad = dict.fromkeys((int(s) for s in usados), 0)
+            
+            while len(heap) > 1:
+                f1, id1, s1 = heapq.heappop(heap)
+                f2, id2, s2 = heapq.heappop(heap)
+                for s in s1 + s2:
+                    profundidad[s] += 1
+                heapq.heappush(heap, (f1 + f2, min(id1, id2), s1 + s2))
+            
+            if max(profundidad.values()) <= max_longitud:
+                break
+            
+            # Aplanar la distribución hasta que el árbol quepa en max_longitud
+            frecuencias[usados] = (frecuencias[usados] + 1) // 2
+        
+        for s, d in profundidad.items():
+            longitudes[s] = d
+        return longitudes
+    
+    @staticmethod
+    def codigos_canonicos(longitudes: np.ndarray) -> np.ndarray:
+        """
+        Asigna códigos Huffman canónicos a partir de sus longitudes.
+        
+        Args:
+            longitudes: Longitud de código por símbolo (0 = no usado)
+        
+        Returns:
+            Código por símbolo (entero alineado a la derecha)
+        """
+        codigos = np.zeros(len(longitudes), dtype=np.uint64)
+        usados = np.flatnonzero(longitudes)
+        orden = usados[np.lexsort((usados, longitudes[usados]))]
+        
+        codigo = 0
+        longitud_previa = 0
+        for s in orden:
+            codigo <<= int(longitudes[s]) - longitud_previa
+            codigos[s] = codigo
+            codigo += 1
+            longitud_previa = int(longitudes[s])
+        return codigos
+    
+    @staticmethod
+    def _empaquetar_bits(valores: np.ndarray, longitudes: np.ndarray) -> Tuple[bytes, np.ndarray]:
+        """
+        Concatena valores de longitud variable (<= 56 bits) en un flujo de bytes.
+        
+        Cada valor ocupa una ventana de 8 bytes a partir de su byte inicial;
+        como los bits de distintos tokens no se solapan, la suma por byte con
+        bincount equivale a un OR y no requiere recorrer los tokens en Python.
+        
+        Returns:
+            datos: Flujo de bytes
+            inicio: Bit inicial de cada valor
+        """
+        fin = np.cumsum(longitudes, dtype=np.int64)
+        inicio = fin - longitudes
+        total_bits = int(fin[-1]) if len(fin) else 0
+        n_bytes = (total_bits + 7) // 8
+        
+        byte_inicial = inicio >> 3
+        desplazamiento = (64 - longitudes - (inicio & 7)).astype(np.uint64)
+        ventana = valores.astype(np.uint64) << desplazamiento
+        
+        salida = np.zeros(n_bytes + 8, dtype=np.float64)
+        for k in range(8):
+            byte_k = (ventana >> np.uint64(56 - 8 * k)) & np.uint64(0xFF)
+            salida += np.bincount(byte_inicial + k, weights=byte_k.astype(np.float64),
+                                  minlength=n_bytes + 8)[:n_bytes + 8]
+        
+        return salida[:n_bytes].astype(np.uint8).tobytes(), inicio
+    
+    @staticmethod
+    def _leer_ventanas(datos: np.ndarray, posiciones: np.ndarray) -> np.ndarray:
+        """Lee los 64 bits que empiezan en cada posición de bit (datos con 8 bytes de relleno)."""
+        base = (posiciones >> 3)[:, None] + np.arange(9)
+        bytes_ = datos[base].astype(np.uint64)
+        palabra = np.zeros(len(posiciones), dtype=np.uint64)
+        for k in range(8):
+            palabra |= bytes_[:, k] << np.uint64(56 - 8 * k)
+        r = (posiciones & 7).astype(np.uint64)
+        # Completar con el noveno byte los bits desplazados fuera de la palabra
+        return (palabra << r) | (bytes_[:, 8] >> (np.uint64(8) - r))
+    
+    @staticmethod
+    def codificar(coef_zigzag: np.ndarray, bloques_por_segmento: int = 64) -> bytes:
+        """
+        Codifica bloques cuantizados en orden zigzag.
+        
+        Args:
+            coef_zigzag: Coeficientes enteros (n_bloques, N*N) en orden zigzag
+            bloques_por_segmento: Bloques por segmento de decodificación paralela
+        
+        Returns:
+            Flujo de bytes con tabla Huffman, tabla de segmentos y datos
+        """
+        coef_zigzag = np.asarray(coef_zigzag, dtype=np.int64)
+        n_bloques, n_coef = coef_zigzag.shape
+        BT = CodificadorEntropia.BITS_TAMANO
+        simbolo_dc = n_coef << BT
+        
+        # DC diferencial
+        dc = np.diff(coef_zigzag[:, 0], prepend=0)
+        
+        # Coeficientes AC no nulos y longitud de la racha de ceros previa
+        bloque_ac, col = np.nonzero(coef_zigzag[:, 1:])
+        posicion = col + 1
+        valores_ac = coef_zigzag[bloque_ac, posicion]
+        previa = np.zeros_like(posicion)
+        previa[1:] = posicion[:-1]
+        primero = np.ones(len(posicion), dtype=bool)
+        primero[1:] = bloque_ac[1:] != bloque_ac[:-1]
+        previa[primero] = 0
+        racha = posicion - previa - 1
+        
+        # EOB salvo que el último coeficiente no nulo sea el último del bloque
+        n_ac = np.bincount(bloque_ac, minlength=n_bloques)
+        inicio_ac = np.cumsum(n_ac) - n_ac
+        ultima = np.zeros(n_bloques, dtype=np.int64)
+        con_ac = n_ac > 0
+        ultima[con_ac] = posicion[(inicio_ac + n_ac - 1)[con_ac]]
+        con_eob = ultima < n_coef - 1
+        
+        # Colocación de los tokens: DC, AC en orden y EOB opcional por bloque
+        tokens_bloque = 1 + n_ac + con_eob
+        offset = np.cumsum(tokens_bloque) - tokens_bloque
+        n_tokens = int(tokens_bloque.sum())
+        
+        tam_dc = CodificadorEntropia._categoria(dc)
+        tam_ac = CodificadorEntropia._categoria(valores_ac)
+        if max(tam_dc.max(initial=0), tam_ac.max(initial=0)) >= CodificadorEntropia.MAX_TAMANO:
+            raise ValueError('Coeficientes demasiado grandes para la codificación')
+        
+        valor = np.zeros(n_tokens, dtype=np.int64)
+        simbolo = np.zeros(n_tokens, dtype=np.int64)
+        
+        valor[offset] = dc
+        simbolo[offset] = simbolo_dc + tam_dc
+        
+        rango = np.arange(len(posicion)) - inicio_ac[bloque_ac]
+        idx_ac = offset[bloque_ac] + 1 + rango
+        valor[idx_ac] = valores_ac
+        simbolo[idx_ac] = (racha << BT) + tam_ac
+        
+        # Los EOB quedan con símbolo 0 y valor 0
+        tamano = simbolo & CodificadorEntropia.MAX_TAMANO
+        
+        # Bits de amplitud (complemento a uno para negativos, como JPEG)
+        amplitud = np.where(valor < 0, valor + (1 << tamano) - 1, valor)
+        
+        # Tabla Huffman de la imagen
+        frecuencias = np.bincount(simbolo, minlength=simbolo_dc + CodificadorEntropia.MAX_TAMANO + 1)
+        longitudes = CodificadorEntropia.longitudes_huffman(frecuencias, CodificadorEntropia.MAX_LONGITUD_CODIGO)
+        codigos = CodificadorEntropia.codigos_canonicos(longitudes)
+        
+        long_codigo = longitudes[simbolo]
+        token = (codigos[simbolo] << tamano.astype(np.uint64)) | amplitud.astype(np.uint64)
+        long_token = long_codigo + tamano
+        
+        payload, inicio_bits = CodificadorEntropia._empaquetar_bits(token, long_token)
+        
+        # Longitud en bits de cada segmento
+        primer_token = offset[::bloques_por_segmento]
+        inicio_segmento = np.append(inicio_bits[primer_token], int(long_token.sum()))
+        long_segmento = np.diff(inicio_segmento).astype('<u4')
+        
+        usados = np.flatnonzero(longitudes)
+        cabecera = struct.pack('<IHIIH', n_bloques, n_coef, bloques_por_segmento,
+                               len(long_segmento), len(usados))
+        return b''.join([
+            cabecera,
+            usados.astype('<u2').tobytes(),
+            longitudes[usados].astype(np.uint8).tobytes(),
+            long_segmento.tobytes(),
+            payload
+        ])
+    
+    @staticmethod
+    def decodificar(datos: bytes) -> np.ndarray:
+        """
+        Decodifica un flujo generado por codificar.
+        
+        Args:
+            datos: Flujo de bytes
+        
+        Returns:
+            Coeficientes enteros (n_bloques, N*N) en orden zigzag
+        """
+        BT = CodificadorEntropia.BITS_TAMANO
+        formato = '<IHIIH'
+        n_bloques, n_coef, bloques_por_segmento, n_segmentos, n_usados = struct.unpack_from(formato, datos)
+        pos = struct.calcsize(formato)
+        
+        usados = np.frombuffer(datos, dtype='<u2', count=n_usados, offset=pos).astype(np.int64)
+        pos += 2 * n_usados
+        longitudes_usados = np.frombuffer(datos, dtype=np.uint8, count=n_usados, offset=pos).astype(np.int64)
+        pos += n_usados
+        long_segmento = np.frombuffer(datos, dtype='<u4', count=n_segmentos, offset=pos).astype(np.int64)
+        pos += 4 * n_segmentos
+        payload = np.frombuffer(datos, dtype=np.uint8, offset=pos)
+        payload = np.concatenate([payload, np.zeros(9, dtype=np.uint8)])
+        
+        # Tabla de búsqueda indexada por los primeros M bits del flujo
+        simbolo_dc = n_coef << BT
+        longitudes = np.zeros(simbolo_dc + CodificadorEntropia.MAX_TAMANO + 1, dtype=np.int64)
+        longitudes[usados] = longitudes_usados
+        codigos = CodificadorEntropia.codigos_canonicos(longitudes)
+        M = int(longitudes_usados.max()) if n_usados else 1
+        lut_simbolo = np.zeros(1 << M, dtype=np.int64)
+        lut_longitud = np.zeros(1 << M, dtype=np.int64)
+        for s in usados:
+            l = int(longitudes[s])
+            c = int(codigos[s]) << (M - l)
+            lut_simbolo[c:c + (1 << (M - l))] = s
+            lut_longitud[c:c + (1 << (M - l))] = l
+        
+        coef = np.zeros((n_bloques, n_coef), dtype=np.int64)
+        
+        # Estado por segmento: bit actual, bloque actual, bloque final, posición en el bloque
+        bit = np.concatenate([[0], np.cumsum(long_segmento)[:-1]]).astype(np.int64)
+        bloque = np.arange(n_segmentos, dtype=np.int64) * bloques_por_segmento
+        bloque_fin = np.minimum(bloque + bloques_por_segmento, n_bloques)
+        k = np.zeros(n_segmentos, dtype=np.int64)
+        activos = np.flatnonzero(bloque < bloque_fin)
+        
+        while len(activos):
+            b = bloque[activos]
+            kk = k[activos]
+            ventana = CodificadorEntropia._leer_ventanas(payload, bit[activos])
+            
+            indice = (ventana >> np.uint64(64 - M)).astype(np.int64)
+            simbolo = lut_simbolo[indice]
+            long_codigo = lut_longitud[indice]
+            tamano = simbolo & CodificadorEntropia.MAX_TAMANO
+            
+            # Amplitud: los 'tamano' bits que siguen al código
+            amplitud = (ventana << long_codigo.astype(np.uint64)) >> (64 - np.maximum(tamano, 1)).astype(np.uint64)
+            amplitud = np.where(tamano > 0, amplitud.astype(np.int64), 0)
+            umbral = np.where(tamano > 0, 1 << np.maximum(tamano - 1, 0), 0)
+            valor = np.where(amplitud < umbral, amplitud - (1 << tamano) + 1, amplitud)
+            
+            es_dc = simbolo >= simbolo_dc
+            es_eob = simbolo == 0
+            destino = np.where(es_dc, 0, kk + (simbolo >> BT))
+            escribir = ~es_eob
+            coef[b[escribir], destino[escribir]] = valor[escribir]
+            
+            kk = np.where(es_eob, n_coef, destino + 1)
+            completo = kk >= n_coef
+            bloque[activos] = b + completo
+            k[activos] = np.where(completo, 0, kk)
+            bit[activos] += long_codigo + tamano
+            
+            activos = activos[bloque[activos] < bloque_fin[activos]]
+        
+        coef[:, 0] = np.cumsum(coef[:, 0])
+        return coef
@@ -0,0 +1,143 @@
+"""
+Módulo de procesamiento de secuencias de frames en dominio de frecuencia
+Reutiliza planes FFT, máscaras y buffers entre frames de la misma forma
+"""
+
+import time
+import numpy as np
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from .backend_fft import BackendFFT
+from .transformada_fourier import TransformadaFourier
+
+
+class FlujoFourier:
+    """
+    Clase para filtrar o analizar secuencias de frames de forma fija.
+    
+    Se inicializa una vez por forma de frame: prepara el plan rfft2/irfft2
+    del backend, los buffers de trabajo y la máscara de medio plano. Cada
+    frame se copia al buffer de entrada y el resultado se escribe en un
+    buffer de salida reutilizado, por lo que el array devuelto se
+    sobrescribe con el siguiente frame (copiarlo si se necesita conservarlo).
+    """
+    
+    def __init__(self, shape: Tuple[int, int], filtro: str = 'butterworth', tipo: str = 'lowpass',
+                 cutoff: Union[float, Tuple[float, float]] = 0.2, orden: int = 2,
+                 backend: Optional[Union[BackendFFT, str]] = None):
+        """
+        Inicializa el flujo.
+        
+        Args:
+            shape: Forma de los frames (filas, columnas)
+            filtro: Tipo de filtro - 'ideal', 'gaussiano', 'butterworth'
+            tipo: Tipo de operación - 'lowpass', 'highpass', 'bandpass', 'bandstop'
+            cutoff: Radio de corte
+            orden: Orden para Butterworth
+            backend: BackendFFT o nombre de backend (None = configurado)
+        """
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.tf = TransformadaFourier(backend)
+        self.mascara = self.tf.crear_mascara_medio_plano(self.shape, filtro=filtro, tipo=tipo,
+                                                         cutoff=cutoff, orden=orden)
+        
+        (self._entrada, self._espectro, self._salida,
+         self._directa, self._inversa) = self.tf.fft.plan_real(self.shape)
+        
+        # Espectro centrado: índice en el medio plano de cada posición del espectro completo
+        rows, cols = self.shape
+        ky = (np.arange(rows) - rows // 2)[:, None]
+        kx = (np.arange(cols) - cols // 2)[None, :]
+        # Las columnas negativas se leen del conjugado: |F(ky, kx)| = |F(-ky, -kx)|
+        fila = np.where(kx < 0, -ky, ky) % rows
+        self._indice_centrado = (fila * (cols // 2 + 1) + np.abs(kx)).ravel()
+        self._magnitud = np.zeros(self._espectro.shape, dtype=self._salida.dtype)
+        self._espectro_centrado = np.zeros(self.shape, dtype=self._salida.dtype)
+        
+        self.frames = 0
+        self.tiempo = 0.0
+    
+    def _cargar(self, frame: np.ndarray):
+        """Copia el frame al buffer de entrada, normalizando uint8 a [0,1]."""
+        if frame.shape != self.shape:
+            raise ValueError(f'Forma de frame {frame.shape} distinta a la del flujo {self.shape}')
+        if frame.dtype == np.uint8:
+            np.multiply(frame, 1.0 / 255.0, out=self._entrada, casting='unsafe')
+        else:
+            np.copyto(self._entrada, frame, casting='unsafe')
+    
+    def filtrar(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Filtra un frame con la máscara del flujo.
+        
+        Args:
+            frame: Frame en escala de grises (uint8 o normalizado [0,1])
+        
+        Returns:
+            Frame filtrado en [0,1] (buffer interno reutilizado)
+        """
+        inicio = time.perf_counter()
+        self._cargar(frame)
+        self._directa()
+        self._espectro *= self.mascara
+        self._inversa()
+        np.clip(self._salida, 0, 1, out=self._salida)
+        self.tiempo += time.perf_counter() - inicio
+        self.frames += 1
+        return self._salida
+    
+    def espectro(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Calcula la magnitud logarítmica centrada del espectro de un frame.
+        
+        Equivale a magnitud_log de TransformadaFourier.fft2_imagen, pero se
+        obtiene del medio plano de rfft2 usando la simetría hermítica.
+        
+        Args:
+            frame: Frame en escala de grises (uint8 o normalizado [0,1])
+        
+        Returns:
+            log(1 + |F|) centrado (buffer interno reutilizado)
+        """
+        inicio = time.perf_counter()
+        self._cargar(frame)
+        self._directa()
+        np.abs(self._espectro, out=self._magnitud)
+        np.log1p(self._magnitud, out=self._magnitud)
+        np.take(self._magnitud.ravel(), self._indice_centrado, out=self._espectro_centrado.ravel())
+        self.tiempo += time.perf_counter() - inicio
+        self.frames += 1
+        return self._espectro_centrado
+    
+    def procesar(self, frames: Iterable[np.ndarray], modo: str = 'filtro') -> Iterator[np.ndarray]:
+        """
+        Procesa un iterable de frames.
+        
+        Args:
+            frames: Iterable o generador de frames de la forma del flujo
+            modo: 'filtro' (frames filtrados) o 'espectro' (magnitud logarítmica)
+        
+        Returns:
+            Iterador de resultados (cada uno es un buffer reutilizado)
+        """
+        if modo == 'filtro':
+            operacion = self.filtrar
+        elif modo == 'espectro':
+            operacion = self.espectro
+        else:
+            raise ValueError(f'Modo desconocido: {modo}')
+        
+        for frame in frames:
+            yield operacion(frame)
+    
+    def estadisticas(self) -> Dict[str, float]:
+        """
+        Devuelve el rendimiento acumulado del flujo.
+        
+        Returns:
+            Diccionario con frames procesados, tiempo total y frames por segundo
+        """
+        return {
+            'frames': self.frames,
+            'tiempo': self.tiempo,
+            'fps': self.frames / self.tiempo if self.tiempo > 0 else 0.0
+        }
@@ -3,9 +3,13 @@ Módulo de Transformada Discreta del Coseno (DCT)
 Implementa compresión por bloques y análisis de calidad
 """
 
+import struct
+import time
 import numpy as np
-import math
-from typing import Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, Optional
+from src.utilidades.metricas_calidad import MetricasCalidad
+from .codificacion_entropia import CodificadorEntropia
 
 
 class TransformadaDCT:
@@ -25,6 +29,10 @@ class TransformadaDCT:
         [72, 92, 95, 98, 112, 100, 103, 99]
     ], dtype=np.float64)
     
+    # Cabecera del flujo comprimido: magic, block_size, alto, ancho, q_factor
+    MAGIC = b'DCTE'
+    FORMATO_CABECERA = '<4sBIId'
+    
     def __init__(self, block_size: int = 8):
         """
         Inicializa la clase de DCT.
@@ -56,8 +64,11 @@ class TransformadaDCT:
         """
         Aplica DCT 2D a un bloque: D = C * bloque * C^T
         
+        Acepta también pilas de bloques (..., N, N); el producto matricial
+        se aplica a todos los bloques a la vez.
+        
         Args:
-            bloque: Bloque de imagen
+            bloque: Bloque de imagen o tensor de bloques
             
         Returns:
             Coeficientes DCT del bloque
@@ -68,6 +79,8 @@ class TransformadaDCT:
         """
         Aplica IDCT 2D a coeficientes: bloque = C^T * coef_dct * C
         
+        Acepta también pilas de coeficientes (..., N, N).
+        
         Args:
             coef_dct: Coeficientes DCT
             
@@ -96,6 +109,56 @@ class TransformadaDCT:
         padded[:h, :w] = img
         return padded, h, w
     
+    def a_bloques(self, padded: np.ndarray) -> np.ndarray:
+        """
+        Reorganiza una imagen rellenada en un tensor de bloques.
+        
+        Args:
+            padded: Imagen con dimensiones múltiplo de block_size
+            
+        Returns:
+            Tensor (nbH, nbW, N, N) con un bloque por posición
+        """
+        N = self.block_size
+        H, W = padded.shape
+        return padded.reshape(H // N, N, W // N, N).swapaxes(1, 2)
+    
+    def desde_bloques(self, bloques: np.ndarray) -> np.ndarray:
+        """
+        Reensambla un tensor de bloques (nbH, nbW, N, N) en una imagen.
+        
+        Args:
+            bloques: Tensor de bloques
+            
+        Returns:
+            Imagen (nbH*N, nbW*N)
+        """
+        nbH, nbW, N, M = bloques.shape
+        return bloques.swapaxes(1, 2).reshape(nbH * N, nbW * M)
+    
+    def coeficientes_bloques(self, img: np.ndarray) -> Tuple[np.ndarray, int, int]:
+        """
+        Calcula la DCT de todos los bloques de la imagen.
+        
+        El resultado no depende del factor de calidad, por lo que puede
+        reutilizarse para cuantizar con distintos valores de Q.
+        
+        Args:
+            img: Imagen en escala de grises normalizada [0,1]
+            
+        Returns:
+            coef_dct: Tensor (nbH, nbW, N, N) de coeficientes DCT
+            h: Altura original
+            w: Ancho original
+        """
+        padded, h, w = self.pad_multiplo(img, self.block_size)
+        
+        # Extraer todos los bloques, centrar y aplicar DCT
+        bloques = self.a_bloques(padded) - 0.5
+        coef_dct = self.dct_bloque_2d(bloques)
+        
+        return coef_dct, h, w
+    
     def comprimir_dct(self, img: np.ndarray, q_factor: float = 0.5) -> Tuple[np.ndarray, Dict]:
         """
         Compresión DCT por bloques.
@@ -108,39 +171,43 @@ class TransformadaDCT:
             recon: Imagen reconstruida
             metricas: Diccionario con métricas de calidad
         """
-        padded, h, w = self.pad_multiplo(img, self.block_size)
-        H, W = padded.shape
+        coef_dct, h, w = self.coeficientes_bloques(img)
+        return self.cuantizar_reconstruir(img, coef_dct, h, w, q_factor)
+    
+    def cuantizar_reconstruir(self, img: np.ndarray, coef_dct: np.ndarray, h: int, w: int,
+                              q_factor: float = 0.5) -> Tuple[np.ndarray, Dict]:
+        """
+        Cuantiza coeficientes DCT precalculados, reconstruye y evalúa.
+        
+        Args:
+            img: Imagen original normalizada [0,1]
+            coef_dct: Coeficientes obtenidos con coeficientes_bloques
+            h: Altura original
+            w: Ancho original
+            q_factor: Factor de calidad
+            
+        Returns:
+            recon: Imagen reconstruida
+            metricas: Diccionario con métricas de calidad
+        """
         Q = self.Q_JPEG * q_factor
         
-        coef_total = 0
-        coef_no_cero = 0
-        recon = np.zeros_like(padded, dtype=np.float64)
-        
-        for i in range(0, H, self.block_size):
-            for j in range(0, W, self.block_size):
-                # Extraer bloque y centrar
-                bloque = padded[i:i+self.block_size, j:j+self.block_size] - 0.5
-                
-                # DCT
-                coef_dct = self.dct_bloque_2d(bloque)
-                
-                # Cuantización
-                coef_cuant = np.round(coef_dct / Q) * Q
-                
-                # Contar coeficientes
-                coef_total += coef_cuant.size
-                coef_no_cero += np.count_nonzero(coef_cuant)
-                
-                # IDCT
-                bloque_recon = self.idct_bloque_2d(coef_cuant)
-                recon[i:i+self.block_size, j:j+self.block_size] = bloque_recon + 0.5
+        # Cuantización
+        coef_cuant = np.round(coef_dct / Q) * Q
+        
+        # Contar coeficientes
+        coef_total = coef_cuant.size
+        coef_no_cero = np.count_nonzero(coef_cuant)
+        
+        # IDCT y reensamblado
+        recon = self.desde_bloques(self.idct_bloque_2d(coef_cuant) + 0.5)
         
         # Recortar al tamaño original
         recon = np.clip(recon[:h, :w], 0, 1)
         
         # Calcular métricas
-        mse = np.mean((img - recon)**2)
-        psnr = 20 * math.log10(1.0) - 10 * math.log10(mse) if mse > 0 else float('inf')
+        mse = MetricasCalidad.mse(img, recon)
+        psnr = MetricasCalidad.psnr(img, recon, rango=1.0)
         tasa_compresion = coef_no_cero / coef_total
         ssim = self.calcular_ssim(img, recon)
         
@@ -154,9 +221,93 @@ class TransformadaDCT:
         
         return recon, metricas
     
+    def codificar_dct(self, img: np.ndarray, q_factor: float = 0.5,
+                      bloques_por_segmento: int = 64) -> Tuple[bytes, Dict]:
+        """
+        Comprime la imagen a un flujo de bytes con codificación entrópica.
+        
+        Los bloques cuantizados se recorren en zigzag y se codifican con
+        run-length y Huffman (ver CodificadorEntropia).
+        
+        Args:
+            img: Imagen en escala de grises normalizada [0,1]
+            q_factor: Factor de calidad
+            bloques_por_segmento: Bloques por segmento de decodificación paralela
+            
+        Returns:
+            datos: Flujo de bytes comprimido
+            metricas: Tamaño, bits por píxel y velocidad de codificación
+        """
+        inicio = time.perf_counter()
+        N = self.block_size
+        
+        coef_dct, h, w = self.coeficientes_bloques(img)
+        Q = self.Q_JPEG * q_factor
+        coef_q = np.round(coef_dct / Q).astype(np.int64)
+        
+        # Bloques en orden zigzag: (n_bloques, N*N)
+        zigzag = coef_q.reshape(-1, N * N)[:, CodificadorEntropia.orden_zigzag(N)]
+        cuerpo = CodificadorEntropia.codificar(zigzag, bloques_por_segmento)
+        
+        cabecera = struct.pack(self.FORMATO_CABECERA, self.MAGIC, N, h, w, q_factor)
+        datos = cabecera + cuerpo
+        
+        tiempo = time.perf_counter() - inicio
+        pixeles = h * w
+        
+        metricas = {
+            'bytes': len(datos),
+            'bpp': 8 * len(datos) / pixeles,
+            'tasa_compresion': pixeles / len(datos),
+            'tiempo_codificacion': tiempo,
+            'mb_s_codificacion': pixeles / 1e6 / tiempo if tiempo > 0 else float('inf'),
+            'q_factor': q_factor
+        }
+        
+        return datos, metricas
+    
+    def decodificar_dct(self, datos: bytes) -> Tuple[np.ndarray, Dict]:
+        """
+        Reconstruye una imagen a partir de un flujo generado por codificar_dct.
+        
+        Args:
+            datos: Flujo de bytes comprimido
+            
+        Returns:
+            recon: Imagen reconstruida en [0,1]
+            metricas: Tiempo y velocidad de decodificación
+        """
+        inicio = time.perf_counter()
+        
+        magic, N, h, w, q_factor = struct.unpack_from(self.FORMATO_CABECERA, datos)
+        if magic != self.MAGIC:
+            raise ValueError('Flujo DCT no válido')
+        if N != self.block_size:
+            raise ValueError(f'Tamaño de bloque {N} distinto al configurado ({self.block_size})')
+        
+        zigzag = CodificadorEntropia.decodificar(datos[struct.calcsize(self.FORMATO_CABECERA):])
+        
+        # Deshacer zigzag y cuantización
+        coef_q = np.empty_like(zigzag)
+        coef_q[:, CodificadorEntropia.orden_zigzag(N)] = zigzag
+        nbH, nbW = (h + N - 1) // N, (w + N - 1) // N
+        coef_cuant = coef_q.reshape(nbH, nbW, N, N) * (self.Q_JPEG * q_factor)
+        
+        recon = self.desde_bloques(self.idct_bloque_2d(coef_cuant) + 0.5)
+        recon = np.clip(recon[:h, :w], 0, 1)
+        
+        tiempo = time.perf_counter() - inicio
+        metricas = {
+            'tiempo_decodificacion': tiempo,
+            'mb_s_decodificacion': h * w / 1e6 / tiempo if tiempo > 0 else float('inf'),
+            'q_factor': q_factor
+        }
+        
+        return recon, metricas
+    
     def calcular_ssim(self, img1: np.ndarray, img2: np.ndarray) -> float:
         """
-        Calcula SSIM (Structural Similarity Index) aproximado.
+        Calcula SSIM (Structural Similarity Index) con ventana gaussiana 11x11.
         
         Args:
             img1: Primera imagen
@@ -165,19 +316,7 @@ class TransformadaDCT:
         Returns:
             Valor SSIM entre 0 y 1
         """
-        C1 = (0.01)**2
-        C2 = (0.03)**2
-        
-        mu1 = np.mean(img1)
-        mu2 = np.mean(img2)
-        sigma1 = np.std(img1)
-        sigma2 = np.std(img2)
-        sigma12 = np.mean((img1 - mu1) * (img2 - mu2))
-        
-        ssim = ((2*mu1*mu2 + C1) * (2*sigma12 + C2)) / \
-               ((mu1**2 + mu2**2 + C1) * (sigma1**2 + sigma2**2 + C2))
-        
-        return float(ssim)
+        return MetricasCalidad.ssim(img1, img2, rango=1.0)
     
     def analizar_bloque(self, img: np.ndarray, pos_i: int = 0, pos_j: int = 0) -> Dict:
         """
@@ -209,13 +348,19 @@ class TransformadaDCT:
             'posicion': (pos_i, pos_j)
         }
     
-    def comparar_calidades(self, img: np.ndarray, q_factors: list = None) -> Dict:
+    def comparar_calidades(self, img: np.ndarray, q_factors: list = None,
+                           max_workers: Optional[int] = None) -> Dict:
         """
         Compara múltiples niveles de calidad.
         
+        La DCT directa se calcula una sola vez; para cada factor solo se
+        repiten la cuantización, la IDCT y las métricas.
+        
         Args:
             img: Imagen original
             q_factors: Lista de factores de calidad a probar
+            max_workers: Hilos para evaluar los factores en paralelo
+                         (None o 1 = secuencial)
             
         Returns:
             Diccionario con resultados para cada factor
@@ -223,10 +368,20 @@ class TransformadaDCT:
         if q_factors is None:
             q_factors = [0.1, 0.2, 0.5, 1.0, 2.0]
         
+        coef_dct, h, w = self.coeficientes_bloques(img)
+        
+        def evaluar(q):
+            return self.cuantizar_reconstruir(img, coef_dct, h, w, q_factor=q)
+        
+        if max_workers is not None and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                salidas = list(executor.map(evaluar, q_factors))
+        else:
+            salidas = [evaluar(q) for q in q_factors]
+        
         resultados = {}
         
-        for q in q_factors:
-            recon, metricas = self.comprimir_dct(img, q_factor=q)
+        for q, (recon, metricas) in zip(q_factors, salidas):
             resultados[q] = {
                 'imagen_reconstruida': recon,
                 'metricas': metricas
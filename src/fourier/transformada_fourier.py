@@ -4,7 +4,10 @@ Implementa FFT 2D y filtros en dominio de frecuencia
 """
 
 import numpy as np
-from typing import Tuple, Dict, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, Union, Optional
+from src.utilidades.cache_lru import CacheLRU
+from .backend_fft import BackendFFT
 
 
 class TransformadaFourier:
@@ -12,8 +15,23 @@ class TransformadaFourier:
     Clase para aplicar la Transformada de Fourier y filtros en dominio de frecuencia.
     """
     
-    def __init__(self):
-        """Inicializa la clase de Transformada de Fourier."""
+    # Cachés compartidas entre instancias: máscaras por parámetros y mallas de distancia por forma
+    _cache_mascaras = CacheLRU(max_bytes=256 * 1024**2)
+    _cache_distancias = CacheLRU(max_bytes=128 * 1024**2)
+    
+    def __init__(self, backend: Optional[Union[BackendFFT, str]] = None):
+        """
+        Inicializa la clase de Transformada de Fourier.
+        
+        Args:
+            backend: BackendFFT o nombre de backend ('numpy', 'scipy', 'pyfftw');
+                     None usa el configurado en config.py o en el entorno
+        """
+        if backend is None:
+            backend = BackendFFT.por_defecto()
+        elif isinstance(backend, str):
+            backend = BackendFFT(backend)
+        self.fft = backend
         self.ultima_fft = None
         self.ultima_magnitud = None
         self.ultima_fase = None
@@ -32,8 +50,8 @@ class TransformadaFourier:
             magnitud_log: Magnitud en escala logarítmica
             fase: Fase del espectro
         """
-        F = np.fft.fft2(img)
-        Fshift = np.fft.fftshift(F)
+        F = self.fft.fft2(img)
+        Fshift = self.fft.fftshift(F)
         magnitud = np.abs(Fshift)
         magnitud_log = np.log(1 + magnitud)
         fase = np.angle(Fshift)
@@ -51,6 +69,9 @@ class TransformadaFourier:
         """
         Crea máscara de filtro en dominio de frecuencia.
         
+        Las máscaras se guardan en una caché LRU compartida por
+        (shape, filtro, tipo, cutoff, orden); el array devuelto es de solo lectura.
+        
         Args:
             shape: Forma de la imagen (filas, columnas)
             filtro: Tipo de filtro - 'ideal', 'gaussiano', 'butterworth'
@@ -61,12 +82,79 @@ class TransformadaFourier:
         Returns:
             Máscara del filtro como array 2D
         """
-        rows, cols = shape
-        crow, ccol = rows // 2, cols // 2
-        Y, X = np.ogrid[:rows, :cols]
-        D = np.sqrt((Y - crow)**2 + (X - ccol)**2)
-        Dnorm = D / float(min(crow, ccol))
+        shape = (int(shape[0]), int(shape[1]))
+        if isinstance(cutoff, list):
+            cutoff = tuple(cutoff)
+        clave = (shape, filtro, tipo, cutoff, orden)
+        return self._cache_mascaras.obtener(
+            clave, lambda: self._construir_mascara(shape, filtro, tipo, cutoff, orden))
+    
+    def distancia_normalizada(self, shape: Tuple[int, int], medio_plano: bool = False) -> np.ndarray:
+        """
+        Malla de distancias al centro del espectro, normalizada al radio menor.
         
+        Se guarda en caché por forma, ya que no depende del filtro.
+        
+        Args:
+            shape: Forma de la imagen (filas, columnas)
+            medio_plano: Si True, devuelve la malla sin shift y solo para las
+                         columnas de rfft2 (cols // 2 + 1)
+            
+        Returns:
+            Array 2D de distancias normalizadas (solo lectura)
+        """
+        rows, cols = int(shape[0]), int(shape[1])
+        
+        def crear():
+            crow, ccol = rows // 2, cols // 2
+            if medio_plano:
+                # Frecuencias enteras en el orden de salida de rfft2 (sin shift)
+                Y = np.fft.ifftshift(np.arange(rows) - crow)[:, None]
+                X = np.arange(cols // 2 + 1)[None, :]
+                D = np.sqrt(Y**2 + X**2)
+            else:
+                Y, X = np.ogrid[:rows, :cols]
+                D = np.sqrt((Y - crow)**2 + (X - ccol)**2)
+            return D / float(min(crow, ccol))
+        
+        return self._cache_distancias.obtener((rows, cols, medio_plano), crear)
+    
+    def crear_mascara_medio_plano(self, shape: Tuple[int, int], filtro: str = 'butterworth',
+                                  tipo: str = 'lowpass', cutoff: Union[float, Tuple[float, float]] = 0.2,
+                                  orden: int = 2) -> np.ndarray:
+        """
+        Crea la máscara de filtro para el espectro de rfft2 (sin shift).
+        
+        Equivale a ifftshift(crear_mascara_filtro(...))[:, :cols // 2 + 1].
+        
+        Args:
+            shape: Forma de la imagen (filas, columnas)
+            filtro: Tipo de filtro - 'ideal', 'gaussiano', 'butterworth'
+            tipo: Tipo de operación - 'lowpass', 'highpass', 'bandpass', 'bandstop'
+            cutoff: Radio de corte (0-0.5), para bandpass/bandstop es (inner, outer)
+            orden: Orden para Butterworth
+            
+        Returns:
+            Máscara (filas, columnas // 2 + 1)
+        """
+        shape = (int(shape[0]), int(shape[1]))
+        if isinstance(cutoff, list):
+            cutoff = tuple(cutoff)
+        clave = (shape, filtro, tipo, cutoff, orden, 'medio_plano')
+        return self._cache_mascaras.obtener(
+            clave, lambda: self._construir_mascara(shape, filtro, tipo, cutoff, orden, medio_plano=True))
+    
+    def _construir_mascara(self, shape: Tuple[int, int], filtro: str, tipo: str,
+                           cutoff: Union[float, Tuple[float, float]], orden: int,
+                           medio_plano: bool = False) -> np.ndarray:
+        """Construye la máscara de filtro sin pasar por la caché."""
+        Dnorm = self.distancia_normalizada(shape, medio_plano)
+        return self._mascara_desde_distancia(Dnorm, filtro, tipo, cutoff, orden)
+    
+    @staticmethod
+    def _mascara_desde_distancia(Dnorm: np.ndarray, filtro: str, tipo: str,
+                                 cutoff: Union[float, Tuple[float, float]], orden: int) -> np.ndarray:
+        """Evalúa la respuesta del filtro sobre una malla de distancias normalizadas."""
         # Crear filtro pasa bajas base
         if filtro == 'ideal':
             H = (Dnorm <= cutoff).astype(np.float32)
@@ -141,17 +229,202 @@ class TransformadaFourier:
             mask: Máscara del filtro aplicado
             Gshift: Espectro filtrado
         """
-        F = np.fft.fft2(img)
-        Fshift = np.fft.fftshift(F)
+        F = self.fft.fft2(img)
+        Fshift = self.fft.fftshift(F)
         mask = self.crear_mascara_filtro(img.shape, filtro=filtro, tipo=tipo, cutoff=cutoff, orden=orden)
         Gshift = Fshift * mask
-        G = np.fft.ifftshift(Gshift)
-        g = np.fft.ifft2(G)
+        G = self.fft.ifftshift(Gshift)
+        g = self.fft.ifft2(G)
         g = np.real(g)
         g = np.clip(g, 0, 1)
         
         return g, mask, Gshift
     
+    def aplicar_filtro_frecuencia_real(self, img: np.ndarray, filtro: str = 'butterworth',
+                                       tipo: str = 'lowpass', cutoff: Union[float, Tuple[float, float]] = 0.2,
+                                       orden: int = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Aplica filtro en frecuencia usando la FFT real (rfft2/irfft2).
+        
+        Para imágenes reales el espectro tiene simetría hermítica, así que
+        basta con la mitad de las columnas y no hacen falta fftshift/ifftshift.
+        El resultado coincide con aplicar_filtro_frecuencia salvo redondeo.
+        
+        Args:
+            img: Imagen en escala de grises normalizada [0,1]
+            filtro: Tipo de filtro
+            tipo: Tipo de operación
+            cutoff: Radio de corte
+            orden: Orden para Butterworth
+            
+        Returns:
+            g: Imagen filtrada
+            mask: Máscara de medio plano aplicada
+            G: Espectro filtrado de medio plano (sin shift)
+        """
+        mask = self.crear_mascara_medio_plano(img.shape, filtro=filtro, tipo=tipo, cutoff=cutoff, orden=orden)
+        G = self.fft.rfft2(img)
+        G *= mask
+        g = self.fft.irfft2(G, s=img.shape)
+        g = np.clip(g, 0, 1, out=g)
+        
+        return g, mask, G
+    
+    def kernel_espacial(self, shape_imagen: Tuple[int, int], filtro: str = 'butterworth',
+                        tipo: str = 'lowpass', cutoff: Union[float, Tuple[float, float]] = 0.2,
+                        orden: int = 2, tamano_diseno: int = 2048, radio: Optional[int] = None,
+                        tolerancia: float = 1e-3) -> np.ndarray:
+        """
+        Convierte la respuesta de crear_mascara_filtro en un kernel espacial compacto.
+        
+        La respuesta se evalúa sobre una malla de tamano_diseno x tamano_diseno
+        con las frecuencias expresadas en las unidades de una imagen de forma
+        shape_imagen, de modo que el kernel reproduce el filtro que se aplicaría
+        a la imagen completa. Después se recorta a la ventana cuadrada más
+        pequeña cuya suma de |h| descartada no supera la tolerancia, lo que
+        acota el error máximo sobre imágenes en [0,1].
+        
+        Args:
+            shape_imagen: Forma de la imagen completa (filas, columnas)
+            filtro: Tipo de filtro
+            tipo: Tipo de operación
+            cutoff: Radio de corte
+            orden: Orden para Butterworth
+            tamano_diseno: Lado de la malla de diseño (limita el radio máximo)
+            radio: Radio del kernel; None lo elige según la tolerancia
+            tolerancia: Suma máxima de |h| que puede quedar fuera del kernel
+            
+        Returns:
+            Kernel (2*radio+1, 2*radio+1) simétrico
+        """
+        rows, cols = int(shape_imagen[0]), int(shape_imagen[1])
+        G = int(tamano_diseno)
+        if isinstance(cutoff, list):
+            cutoff = tuple(cutoff)
+        
+        def crear():
+            k = np.fft.ifftshift(np.arange(G) - G // 2)
+            dy = k[:, None] * (rows / G)
+            dx = k[None, :] * (cols / G)
+            Dnorm = np.sqrt(dy**2 + dx**2) / float(min(rows // 2, cols // 2))
+            mask = self._mascara_desde_distancia(Dnorm, filtro, tipo, cutoff, orden)
+            return np.fft.fftshift(np.real(self.fft.ifft2(mask)))
+        
+        clave = ('kernel', (rows, cols), filtro, tipo, cutoff, orden, G)
+        h = self._cache_mascaras.obtener(clave, crear)
+        c = G // 2
+        
+        if radio is None:
+            # |h| acumulado por anillos cuadrados (distancia de Chebyshev al centro)
+            Y, X = np.ogrid[:G, :G]
+            anillo = np.maximum(np.abs(Y - c), np.abs(X - c)).ravel()
+            acumulada = np.cumsum(np.bincount(anillo, weights=np.abs(h).ravel()))
+            radio = int(np.searchsorted(acumulada, acumulada[-1] - tolerancia))
+        radio = int(min(radio, c - 1))
+        
+        return h[c - radio:c + radio + 1, c - radio:c + radio + 1]
+    
+    @staticmethod
+    def _tramos(inicio: int, fin: int, n: int) -> list:
+        """Divide el rango [inicio, fin) con envoltura periódica en tramos contiguos de [0, n)."""
+        indices = np.arange(inicio, fin) % n
+        cortes = np.flatnonzero(np.diff(indices) != 1) + 1
+        return [(int(t[0]), int(t[-1]) + 1) for t in np.split(indices, cortes)]
+    
+    @staticmethod
+    def _leer_region(img: np.ndarray, y0: int, y1: int, x0: int, x1: int) -> np.ndarray:
+        """
+        Lee la región [y0, y1) x [x0, x1) con envoltura periódica, como la FFT global.
+        
+        Solo se leen del array (o memmap) los tramos contiguos necesarios.
+        """
+        rows, cols = img.shape
+        tramos_y = TransformadaFourier._tramos(y0, y1, rows)
+        tramos_x = TransformadaFourier._tramos(x0, x1, cols)
+        return np.block([[np.asarray(img[a:b, c:d], dtype=np.float64) for c, d in tramos_x]
+                         for a, b in tramos_y])
+    
+    def aplicar_filtro_por_bloques(self, entrada: Union[np.ndarray, str], salida: Union[np.ndarray, str, None] = None,
+                                   filtro: str = 'butterworth', tipo: str = 'lowpass',
+                                   cutoff: Union[float, Tuple[float, float]] = 0.2, orden: int = 2,
+                                   tamano_bloque: int = 1024, radio_kernel: Optional[int] = None,
+                                   max_workers: Optional[int] = None) -> np.ndarray:
+        """
+        Aplica el filtro por bloques con overlap-save, para imágenes que no caben en memoria.
+        
+        El filtro se convierte en un kernel espacial (kernel_espacial) y cada
+        bloque se lee con un margen igual al radio del kernel, se convoluciona
+        mediante FFT y solo se escribe su parte válida. El borde se trata de
+        forma periódica, igual que la FFT global. La memoria usada depende
+        del tamaño de bloque y no del de la imagen. El filtro ideal tiene un
+        kernel de soporte muy amplio, por lo que su aproximación por bloques
+        es más lenta y menos precisa que la de Butterworth o gaussiano.
+        
+        Args:
+            entrada: Imagen normalizada [0,1], memmap o ruta a un .npy (se abre con mmap)
+            salida: Array/memmap de salida, ruta a un .npy a crear, o None (array en memoria)
+            filtro: Tipo de filtro
+            tipo: Tipo de operación
+            cutoff: Radio de corte
+            orden: Orden para Butterworth
+            tamano_bloque: Lado de cada bloque de salida
+            radio_kernel: Radio del kernel espacial (None = automático)
+            max_workers: Hilos para procesar bloques en paralelo (None o 1 = secuencial)
+            
+        Returns:
+            Imagen filtrada (la misma salida recibida o creada)
+        """
+        if isinstance(entrada, str):
+            entrada = np.load(entrada, mmap_mode='r')
+        rows, cols = entrada.shape
+        
+        if isinstance(salida, str):
+            salida = np.lib.format.open_memmap(salida, mode='w+', dtype=np.float32, shape=(rows, cols))
+        elif salida is None:
+            salida = np.empty((rows, cols), dtype=np.float32)
+        
+        # Si la imagen cabe en un bloque, la FFT global es exacta y barata
+        if rows <= tamano_bloque and cols <= tamano_bloque:
+            salida[:] = self.aplicar_filtro_frecuencia_real(np.asarray(entrada), filtro=filtro, tipo=tipo,
+                                                            cutoff=cutoff, orden=orden)[0]
+            return salida
+        
+        kernel = self.kernel_espacial((rows, cols), filtro=filtro, tipo=tipo, cutoff=cutoff, orden=orden,
+                                      tamano_diseno=2 * tamano_bloque, radio=radio_kernel)
+        r = kernel.shape[0] // 2
+        L = tamano_bloque + 2 * r
+        
+        # Espectro del kernel con su centro en el origen, común a todos los bloques
+        K = np.zeros((L, L))
+        K[:2 * r + 1, :2 * r + 1] = kernel
+        K = np.roll(K, (-r, -r), axis=(0, 1))
+        Kf = self.fft.rfft2(K)
+        
+        def procesar(origen):
+            y0, x0 = origen
+            y1 = min(y0 + tamano_bloque, rows)
+            x1 = min(x0 + tamano_bloque, cols)
+            region = np.zeros((L, L))
+            bloque = self._leer_region(entrada, y0 - r, y1 + r, x0 - r, x1 + r)
+            region[:bloque.shape[0], :bloque.shape[1]] = bloque
+            
+            R = self.fft.rfft2(region)
+            R *= Kf
+            filtrado = self.fft.irfft2(R, s=(L, L))
+            salida[y0:y1, x0:x1] = np.clip(filtrado[r:r + y1 - y0, r:r + x1 - x0], 0, 1)
+        
+        origenes = [(y0, x0) for y0 in range(0, rows, tamano_bloque) for x0 in range(0, cols, tamano_bloque)]
+        if max_workers is not None and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(procesar, origenes))
+        else:
+            for origen in origenes:
+                procesar(origen)
+        
+        if isinstance(salida, np.memmap):
+            salida.flush()
+        return salida
+    
     def reconstruir_desde_magnitud_fase(self, magnitud: np.ndarray, fase: np.ndarray) -> np.ndarray:
         """
         Reconstruye imagen desde magnitud y fase.
@@ -164,17 +437,55 @@ class TransformadaFourier:
             Imagen reconstruida
         """
         Fshift = magnitud * np.exp(1j * fase)
-        F = np.fft.ifftshift(Fshift)
-        img = np.fft.ifft2(F)
+        F = self.fft.ifftshift(Fshift)
+        img = self.fft.ifft2(F)
         img = np.real(img)
         img = np.clip(img, 0, 1)
         
         return img
     
+    def _indices_radiales(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Mapa de radio entero por píxel (aplanado) y número de píxeles por radio.
+        
+        Se guarda en caché por forma junto con las mallas de distancia. El
+        mapa usa uint16 (int32 si el radio no cabe) para que a 4096x4096
+        ocupe 32 MiB y quepa en la caché.
+        """
+        rows, cols = int(shape[0]), int(shape[1])
+        crow, ccol = rows // 2, cols // 2
+        max_radio = int(np.sqrt(crow**2 + ccol**2))
+        dtype = np.uint16 if max_radio <= np.iinfo(np.uint16).max else np.int32
+        
+        def crear():
+            Y, X = np.ogrid[:rows, :cols]
+            D = np.sqrt((Y - crow)**2 + (X - ccol)**2).astype(dtype).ravel()
+            conteos = np.bincount(D, minlength=max_radio + 1)[:max_radio]
+            return D, conteos
+        
+        D, conteos = self._cache_distancias.obtener((rows, cols, 'radio'), crear)
+        return D, conteos, max_radio
+    
+    def _indices_sectores(self, shape: Tuple[int, int], n_sectores: int) -> np.ndarray:
+        """Mapa de sector angular por píxel (aplanado), en caché por forma y número de sectores."""
+        rows, cols = int(shape[0]), int(shape[1])
+        
+        def crear():
+            crow, ccol = rows // 2, cols // 2
+            Y, X = np.ogrid[:rows, :cols]
+            angulo = np.arctan2(Y - crow, X - ccol)
+            sector = np.floor((angulo + np.pi) / (2 * np.pi) * n_sectores).astype(np.int32)
+            return (sector % n_sectores).astype(np.uint16 if n_sectores <= 65536 else np.int32).ravel()
+        
+        return self._cache_distancias.obtener((rows, cols, 'sectores', n_sectores), crear)
+    
     def calcular_perfil_radial(self, espectro: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
         Calcula el perfil radial del espectro.
         
+        Promedia el espectro por radio entero con una sola pasada de
+        np.bincount; el mapa de radios se reutiliza entre llamadas.
+        
         Args:
             espectro: Espectro de frecuencia (magnitud)
             
@@ -182,22 +493,52 @@ class TransformadaFourier:
             radios: Array de radios
             perfil: Valores promedio del espectro para cada radio
         """
-        rows, cols = espectro.shape
-        crow, ccol = rows // 2, cols // 2
-        Y, X = np.ogrid[:rows, :cols]
-        D = np.sqrt((Y - crow)**2 + (X - ccol)**2).astype(int)
-        
-        max_radio = int(np.sqrt(crow**2 + ccol**2))
+        D, conteos, max_radio = self._indices_radiales(espectro.shape)
         radios = np.arange(0, max_radio)
-        perfil = np.zeros(max_radio)
         
-        for r in radios:
-            mask = (D == r)
-            if np.sum(mask) > 0:
-                perfil[r] = np.mean(espectro[mask])
+        sumas = np.bincount(D, weights=espectro.ravel(), minlength=max_radio + 1)[:max_radio]
+        perfil = np.zeros(max_radio)
+        np.divide(sumas, conteos, out=perfil, where=conteos > 0)
         
         return radios, perfil
     
+    def calcular_perfil_azimutal(self, espectro: np.ndarray, n_sectores: int = 36,
+                                 radio_min: float = 0, radio_max: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula el perfil angular del espectro por sectores.
+        
+        Útil para detectar orientaciones dominantes (bordes, patrones
+        periódicos) que el perfil radial promedia.
+        
+        Args:
+            espectro: Espectro de frecuencia centrado (magnitud)
+            n_sectores: Número de sectores angulares en [-pi, pi)
+            radio_min: Radio mínimo incluido (excluye la componente DC con 1)
+            radio_max: Radio máximo incluido (None = sin límite)
+            
+        Returns:
+            angulos: Ángulo central de cada sector en radianes
+            perfil: Valor promedio del espectro en cada sector
+        """
+        sector = self._indices_sectores(espectro.shape, n_sectores)
+        valores = espectro.ravel()
+        
+        if radio_min > 0 or radio_max is not None:
+            D, _, _ = self._indices_radiales(espectro.shape)
+            seleccion = D >= radio_min
+            if radio_max is not None:
+                seleccion &= D <= radio_max
+            sector = sector[seleccion]
+            valores = valores[seleccion]
+        
+        sumas = np.bincount(sector, weights=valores, minlength=n_sectores)
+        conteos = np.bincount(sector, minlength=n_sectores)
+        perfil = np.zeros(n_sectores)
+        np.divide(sumas, conteos, out=perfil, where=conteos > 0)
+        
+        angulos = -np.pi + (np.arange(n_sectores) + 0.5) * (2 * np.pi / n_sectores)
+        return angulos, perfil
+    
     def obtener_estadisticas(self, img: np.ndarray) -> Dict[str, float]:
         """
         Calcula estadísticas básicas del espectro.
@@ -220,3 +561,36 @@ class TransformadaFourier:
             'fase_mean': float(fase.mean()),
             'fase_std': float(fase.std())
         }
+    
+    @classmethod
+    def estadisticas_cache(cls) -> Dict[str, Dict[str, float]]:
+        """
+        Devuelve aciertos, fallos y ocupación de las cachés de máscaras y distancias.
+        
+        Returns:
+            Diccionario con las estadísticas de cada caché
+        """
+        return {
+            'mascaras': cls._cache_mascaras.estadisticas(),
+            'distancias': cls._cache_distancias.estadisticas()
+        }
+    
+    @classmethod
+    def limpiar_cache(cls):
+        """Vacía las cachés de máscaras y distancias."""
+        cls._cache_mascaras.limpiar()
+        cls._cache_distancias.limpiar()
+    
+    @classmethod
+    def configurar_cache(cls, max_bytes_mascaras: int = None, max_bytes_distancias: int = None):
+        """
+        Ajusta el límite de memoria de las cachés.
+        
+        Args:
+            max_bytes_mascaras: Límite para la caché de máscaras
+            max_bytes_distancias: Límite para la caché de distancias
+        """
+        if max_bytes_mascaras is not None:
+            cls._cache_mascaras.redimensionar(max_bytes_mascaras)
+        if max_bytes_distancias is not None:
+            cls._cache_distancias.redimensionar(max_bytes_distancias)
@@ -37,6 +37,9 @@ class SeccionAjusteBrillo(SeccionBase):
         if metodo == "gamma":
             gamma_spin = dialogo.agregar_spin("Valor Gamma:", 0.1, 5.0, 1.5, 0.1, es_double=True)
         
+        # Las imágenes en color se pueden procesar solo en la luminancia para conservar el color
+        salida_combo = dialogo.agregar_combo("Salida:", ["Escala de grises", "Color (luminancia YCrCb)"], 0)
+        
         info = QLabel(f"Se aplicará {nombres[metodo]} a la imagen seleccionada")
         info.setStyleSheet(f"color: {COLOR_ACENTO}; font-style: italic;")
         info.setWordWrap(True)
@@ -51,15 +54,20 @@ class SeccionAjusteBrillo(SeccionBase):
             
             try:
                 if metodo == "gamma":
-                    resultado = AjusteBrillo.correccion_gamma(imagen, gamma_spin.value())
+                    operacion, args = AjusteBrillo.correccion_gamma, (gamma_spin.value(),)
                 elif metodo == "clahe":
-                    resultado = AjusteBrillo.clahe(imagen)
+                    operacion, args = AjusteBrillo.clahe, ()
                 elif metodo == "uniforme":
-                    resultado = AjusteBrillo.ecualizacion_uniforme(imagen)
+                    operacion, args = AjusteBrillo.ecualizacion_uniforme, ()
                 elif metodo == "exponencial":
-                    resultado = AjusteBrillo.ecualizacion_exponencial(imagen)
+                    operacion, args = AjusteBrillo.ecualizacion_exponencial, ()
                 elif metodo == "rayleigh":
-                    resultado = AjusteBrillo.ecualizacion_rayleigh(imagen)
+                    operacion, args = AjusteBrillo.ecualizacion_rayleigh, ()
+                
+                if salida_combo.currentIndex() == 1 and len(imagen.shape) == 3 and imagen.shape[2] == 3:
+                    resultado = AjusteBrillo.en_luminancia(imagen, operacion, *args)
+                else:
+                    resultado = operacion(imagen, *args)
                 
                 dialogo.actualizar_imagen_seleccionada(resultado)
                 self.ventana_principal.statusBar().showMessage(f"{nombres[metodo]} aplicado")
@@ -33,30 +33,23 @@ class SeccionComponentesConexas(SeccionBase):
         dialogo.layout_principal.addWidget(info)
         
         def aplicar():
+            from src.procesamiento_avanzado import ComponentesConexas
+            
             imagen, tipo = dialogo.obtener_imagen_seleccionada()
             if imagen is None:
                 return
             
             try:
-                # Convertir a binaria si no lo es
-                if len(imagen.shape) == 3:
-                    imagen_gris = cv2.cvtColor(imagen, cv2.COLOR_RGB2GRAY)
-                else:
-                    imagen_gris = imagen.copy()
-                
-                _, imagen_bin = cv2.threshold(imagen_gris, 127, 255, cv2.THRESH_BINARY)
-                
-                # Detectar componentes
+                # Detectar componentes (binarización en 127, reutilizada si la imagen no cambió)
                 conn = 8 if conectividad.currentText() == "8" else 4
-                num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
-                    imagen_bin, connectivity=conn
-                )
+                analisis = ComponentesConexas.analizar(imagen, conn)
+                num_labels = analisis.num_labels
                 
                 # Crear imagen coloreada
                 colors = np.random.randint(0, 255, size=(num_labels, 3), dtype=np.uint8)
                 colors[0] = [0, 0, 0]  # Fondo negro
                 
-                resultado = colors[labels]
+                resultado = colors[analisis.labels]
                 
                 dialogo.actualizar_imagen_seleccionada(resultado)
                 self.ventana_principal.statusBar().showMessage(
@@ -82,27 +75,20 @@ class SeccionComponentesConexas(SeccionBase):
         dialogo.layout_principal.addWidget(info)
         
         def aplicar():
+            from src.procesamiento_avanzado import ComponentesConexas
+            
             imagen, tipo = dialogo.obtener_imagen_seleccionada()
             if imagen is None:
                 return
             
             try:
-                # Convertir a binaria
-                if len(imagen.shape) == 3:
-                    imagen_gris = cv2.cvtColor(imagen, cv2.COLOR_RGB2GRAY)
-                else:
-                    imagen_gris = imagen.copy()
-                
-                _, imagen_bin = cv2.threshold(imagen_gris, 127, 255, cv2.THRESH_BINARY)
-                
-                # Analizar componentes con estadísticas
+                # Analizar componentes con estadísticas (reutilizado si la imagen no cambió)
                 conn = 8 if conectividad.currentText() == "8" else 4
-                num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
-                    imagen_bin, connectivity=conn
-                )
+                analisis = ComponentesConexas.analizar(imagen, conn)
+                imagen_bin = analisis.binaria
                 
                 # Número de componentes (sin contar el fondo)
-                num_componentes = num_labels - 1
+                num_componentes = analisis.num_componentes
                 
                 if num_componentes == 0:
                     QMessageBox.warning(
@@ -113,9 +99,10 @@ class SeccionComponentesConexas(SeccionBase):
                     return
                 
                 # Extraer estadísticas (ignorar fondo en índice 0)
-                areas = stats[1:, cv2.CC_STAT_AREA]
-                anchos = stats[1:, cv2.CC_STAT_WIDTH]
-                alturas = stats[1:, cv2.CC_STAT_HEIGHT]
+                tabla = analisis.tabla
+                areas = tabla['area']
+                anchos = tabla['ancho']
+                alturas = tabla['alto']
                 
                 # Calcular estadísticas básicas de área
                 area_min = np.min(areas)
@@ -133,40 +120,10 @@ class SeccionComponentesConexas(SeccionBase):
                 
                 # ===== CARACTERÍSTICAS AVANZADAS =====
                 
-                # Calcular perímetros y circularidad para cada componente
-                circularidades = []
-                perimetros = []
-                relaciones_aspecto = []
-                
-                for i in range(1, num_labels):
-                    # Crear máscara para esta componente
-                    mask = (labels == i).astype(np.uint8) * 255
-                    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    
-                    if contours:
-                        perimetro = cv2.arcLength(contours[0], True)
-                        perimetros.append(perimetro)
-                        
-                        # Circularidad: 4π*Área / Perímetro² (1.0 = círculo perfecto)
-                        if perimetro > 0:
-                            circularidad = (4 * np.pi * areas[i-1]) / (perimetro ** 2)
-                            circularidades.append(min(circularidad, 1.0))  # Limitar a 1.0
-                        else:
-                            circularidades.append(0.0)
-                    else:
-                        perimetros.append(0.0)
-                        circularidades.append(0.0)
-                    
-                    # Relación de aspecto (ancho/alto)
-                    if alturas[i-1] > 0:
-                        relacion = anchos[i-1] / alturas[i-1]
-                        relaciones_aspecto.append(relacion)
-                    else:
-                        relaciones_aspecto.append(0.0)
-                
-                circularidades = np.array(circularidades)
-                perimetros = np.array(perimetros)
-                relaciones_aspecto = np.array(relaciones_aspecto)
+                # Perímetros y circularidad (1.0 = círculo perfecto) calculados sobre la bbox de cada componente
+                perimetros = tabla['perimetro']
+                circularidades = np.minimum(tabla['circularidad'], 1.0)  # Limitar a 1.0
+                relaciones_aspecto = tabla['aspect_ratio']
                 
                 # Estadísticas de circularidad
                 circ_promedio = np.mean(circularidades)
@@ -277,24 +234,19 @@ class SeccionComponentesConexas(SeccionBase):
         dialogo.layout_principal.addWidget(info)
         
         def aplicar():
+            from src.procesamiento_avanzado import ComponentesConexas
+            
             imagen, tipo = dialogo.obtener_imagen_seleccionada()
             if imagen is None:
                 return
             
             try:
-                # Convertir a binaria
-                if len(imagen.shape) == 3:
-                    imagen_gris = cv2.cvtColor(imagen, cv2.COLOR_RGB2GRAY)
-                else:
-                    imagen_gris = imagen.copy()
-                
-                _, imagen_bin = cv2.threshold(imagen_gris, 127, 255, cv2.THRESH_BINARY)
-                
-                # Detectar componentes
-                num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(imagen_bin)
+                # Detectar componentes (reutilizado si la imagen no cambió)
+                analisis = ComponentesConexas.analizar(imagen)
+                num_labels, centroids = analisis.num_labels, analisis.centroids
                 
                 # Crear imagen RGB para dibujar
-                resultado = cv2.cvtColor(imagen_bin, cv2.COLOR_GRAY2RGB)
+                resultado = cv2.cvtColor(analisis.binaria, cv2.COLOR_GRAY2RGB)
                 
                 # Dibujar etiquetas
                 for i in range(1, num_labels):
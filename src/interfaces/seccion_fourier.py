@@ -59,11 +59,11 @@ class SeccionFourier(SeccionBase):
                     resultado = CargadorImagenes.desnormalizar(magnitud_log / magnitud_log.max())
                 elif operacion == "lowpass":
                     cutoff = cutoff_spin.value()
-                    img_filt, _, _ = tf.aplicar_filtro_frecuencia(img_norm, tipo='lowpass', cutoff=cutoff)
+                    img_filt, _, _ = tf.aplicar_filtro_frecuencia_real(img_norm, tipo='lowpass', cutoff=cutoff)
                     resultado = CargadorImagenes.desnormalizar(img_filt)
                 elif operacion == "highpass":
                     cutoff = cutoff_spin.value()
-                    img_filt, _, _ = tf.aplicar_filtro_frecuencia(img_norm, tipo='highpass', cutoff=cutoff)
+                    img_filt, _, _ = tf.aplicar_filtro_frecuencia_real(img_norm, tipo='highpass', cutoff=cutoff)
                     resultado = CargadorImagenes.desnormalizar(img_filt)
                 
                 dialogo.actualizar_imagen_seleccionada(resultado)
@@ -5,6 +5,6 @@ Módulo de procesamiento avanzado
 from .filtros import Filtros
 from .ruido import GeneradorRuido
 from .morfologia import MorfologiaMatematica
-from .componentes_conexas import ComponentesConexas
+from .componentes_conexas import ComponentesConexas, AnalisisComponentes
 
-__all__ = ['Filtros', 'GeneradorRuido', 'MorfologiaMatematica', 'ComponentesConexas']
+__all__ = ['Filtros', 'GeneradorRuido', 'MorfologiaMatematica', 'ComponentesConexas', 'AnalisisComponentes']
@@ -3,13 +3,69 @@ Módulo de análisis de componentes conexas
 """
 
 import cv2
+import hashlib
 import numpy as np
-from typing import Tuple, List, Dict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from typing import Tuple, List, Dict, Optional, Union
+from src.utilidades.cache_lru import CacheLRU
+
+
+class AnalisisComponentes:
+    """
+    Resultado del etiquetado de una imagen binarizada.
+    
+    Guarda etiquetas, estadísticas y centroides de connectedComponentsWithStats
+    y calcula la tabla de propiedades (perímetro, circularidad) solo la
+    primera vez que se pide.
+    """
+    
+    def __init__(self, imagen: np.ndarray, conectividad: int = 8, umbral: int = 127):
+        """
+        Binariza y etiqueta la imagen.
+        
+        Args:
+            imagen: Imagen en escala de grises o RGB
+            conectividad: 4 u 8
+            umbral: Umbral de binarización
+        """
+        if len(imagen.shape) == 3:
+            imagen_gris = cv2.cvtColor(imagen, cv2.COLOR_RGB2GRAY)
+        else:
+            imagen_gris = imagen
+        
+        _, self.binaria = cv2.threshold(imagen_gris, umbral, 255, cv2.THRESH_BINARY)
+        self.conectividad = conectividad
+        self.num_labels, self.labels, self.stats, self.centroids = \
+            ComponentesConexas.etiquetar_componentes(self.binaria, conectividad)
+        self._tabla = None
+    
+    @property
+    def num_componentes(self) -> int:
+        """Número de componentes sin contar el fondo."""
+        return self.num_labels - 1
+    
+    @property
+    def tabla(self) -> Dict[str, np.ndarray]:
+        """Tabla de propiedades_regiones, calculada bajo demanda."""
+        if self._tabla is None:
+            self._tabla = ComponentesConexas.propiedades_regiones(self.labels, self.stats, self.centroids)
+        return self._tabla
+    
+    @property
+    def nbytes(self) -> int:
+        """Memoria ocupada por los arrays del análisis."""
+        return self.binaria.nbytes + self.labels.nbytes + self.stats.nbytes + self.centroids.nbytes
 
 
 class ComponentesConexas:
     """Clase para análisis de componentes conexas."""
     
+    # Análisis recientes por contenido de imagen, compartidos entre secciones de la interfaz
+    _cache_analisis = CacheLRU(max_bytes=512 * 1024**2, max_elementos=8)
+    
     @staticmethod
     def etiquetar_componentes(bin_img: np.ndarray, connectivity: int = 8) -> Tuple:
         """
@@ -23,6 +79,257 @@ class ComponentesConexas:
         
         return cv2.connectedComponentsWithStats(bin_img, connectivity=connectivity)
     
+    @staticmethod
+    def _etiquetar_bloque(entrada: Union[np.ndarray, str], y0: int, y1: int, x0: int, x1: int,
+                          connectivity: int, devolver_labels: bool) -> Tuple:
+        """
+        Etiqueta un bloque y devuelve sus estadísticas y sus bordes.
+        
+        Se puede ejecutar en otro proceso: si la entrada es una ruta, el
+        bloque se lee allí mismo con mmap.
+        """
+        if isinstance(entrada, str):
+            entrada = np.load(entrada, mmap_mode='r')
+        bloque = (np.asarray(entrada[y0:y1, x0:x1]) != 0).astype(np.uint8)
+        
+        n, labels, stats, centroids = cv2.connectedComponentsWithStats(bloque, connectivity=connectivity)
+        bordes = (labels[0].copy(), labels[-1].copy(), labels[:, 0].copy(), labels[:, -1].copy())
+        return n, stats, centroids, bordes, labels if devolver_labels else None
+    
+    @staticmethod
+    def _pares_borde(a: np.ndarray, b: np.ndarray, connectivity: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares de nodos vecinos entre dos líneas de píxeles adyacentes.
+        
+        Args:
+            a, b: Identificadores globales de nodo a cada lado de la costura (-1 = fondo)
+            connectivity: 4 (solo enfrente) u 8 (también diagonales)
+        """
+        desplazamientos = (0,) if connectivity == 4 else (-1, 0, 1)
+        n = len(a)
+        origenes, destinos = [], []
+        for d in desplazamientos:
+            ia = a[max(0, -d):n - max(0, d)]
+            ib = b[max(0, d):n - max(0, -d)]
+            validos = (ia >= 0) & (ib >= 0)
+            origenes.append(ia[validos])
+            destinos.append(ib[validos])
+        return np.concatenate(origenes), np.concatenate(destinos)
+    
+    @staticmethod
+    def etiquetar_por_bloques(entrada: Union[np.ndarray, str], salida: Union[np.ndarray, str, None] = None,
+                              connectivity: int = 8, tamano_bloque: int = 4096,
+                              max_workers: Optional[int] = None, procesos: bool = False) -> Tuple:
+        """
+        Etiqueta componentes conexas por bloques, para binarias que no caben en memoria.
+        
+        Cada bloque se etiqueta por separado con connectedComponentsWithStats.
+        Las etiquetas que se tocan a través de las costuras entre bloques se
+        unen con una búsqueda de componentes conexas sobre el grafo de pares
+        vecinos (equivalente a union-find), y área, bbox y centroide globales
+        se obtienen combinando las estadísticas de cada bloque. Solo se
+        mantienen en memoria un bloque por hilo y los bordes de los bloques;
+        la imagen de etiquetas completa solo se escribe si se pide una salida.
+        
+        Args:
+            entrada: Imagen binaria (distinto de 0 = objeto), memmap o ruta a un .npy (se abre con mmap)
+            salida: Array/memmap int32 para las etiquetas, ruta a un .npy a crear, o None (no se generan)
+            connectivity: 4 u 8
+            tamano_bloque: Lado de cada bloque
+            max_workers: Trabajadores para etiquetar bloques en paralelo (None o 1 = secuencial)
+            procesos: Usar procesos en lugar de hilos (con una ruta de entrada cada
+                      proceso lee su bloque; con un array el bloque se copia al proceso)
+        
+        Returns:
+            num_labels, labels (salida o None), stats, centroids con el formato de
+            connectedComponentsWithStats (fila 0 = fondo); las etiquetas se numeran
+            en el orden de los bloques
+        """
+        if connectivity not in (4, 8):
+            raise ValueError(f'Conectividad desconocida: {connectivity}')
+        
+        ruta = entrada if isinstance(entrada, str) else None
+        if ruta is not None:
+            entrada = np.load(ruta, mmap_mode='r')
+        rows, cols = entrada.shape
+        
+        if isinstance(salida, str):
+            salida = np.lib.format.open_memmap(salida, mode='w+', dtype=np.int32, shape=(rows, cols))
+        
+        filas = list(range(0, rows, tamano_bloque))
+        columnas = list(range(0, cols, tamano_bloque))
+        bloques = [(y0, min(y0 + tamano_bloque, rows), x0, min(x0 + tamano_bloque, cols))
+                   for y0 in filas for x0 in columnas]
+        
+        # Fase 1: etiquetado local de cada bloque
+        def tarea(b):
+            y0, y1, x0, x1 = b
+            if procesos and ruta is None:
+                # Sin ruta el bloque viaja copiado al proceso
+                return np.asarray(entrada[y0:y1, x0:x1]), 0, y1 - y0, 0, x1 - x0
+            return (ruta if procesos else entrada), y0, y1, x0, x1
+        
+        def guardar(b, resultado):
+            # Las etiquetas locales se vuelcan a la salida para no acumularlas en memoria
+            if resultado[4] is not None:
+                y0, y1, x0, x1 = b
+                salida[y0:y1, x0:x1] = resultado[4]
+            return resultado[:4]
+        
+        resultados = [None] * len(bloques)
+        if max_workers is not None and max_workers > 1:
+            ejecutor = ProcessPoolExecutor if procesos else ThreadPoolExecutor
+            with ejecutor(max_workers=max_workers) as executor:
+                # Solo unos pocos bloques en vuelo: los argumentos se preparan al enviar cada
+                # bloque y cada resultado se vuelca y se suelta en cuanto termina
+                en_vuelo = {}
+                for k, b in enumerate(bloques):
+                    en_vuelo[executor.submit(ComponentesConexas._etiquetar_bloque, *tarea(b),
+                                             connectivity, salida is not None)] = k
+                    while en_vuelo and (len(en_vuelo) >= 2 * max_workers or k == len(bloques) - 1):
+                        terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                        for futuro in terminados:
+                            j = en_vuelo.pop(futuro)
+                            resultados[j] = guardar(bloques[j], futuro.result())
+                        del terminados, futuro
+        else:
+            for k, b in enumerate(bloques):
+                resultados[k] = guardar(b, ComponentesConexas._etiquetar_bloque(
+                    *tarea(b), connectivity, salida is not None))
+        
+        # Identificador global de nodo: base del bloque + etiqueta local - 1
+        cuentas = np.array([r[0] - 1 for r in resultados], dtype=np.int64)
+        bases = np.concatenate(([0], np.cumsum(cuentas)))
+        total_nodos = int(bases[-1])
+        
+        def nodos(borde, k):
+            ids = borde.astype(np.int64) + (bases[k] - 1)
+            ids[borde == 0] = -1
+            return ids
+        
+        # Fase 2: pares de etiquetas vecinas a través de las costuras
+        nc = len(columnas)
+        origenes, destinos = [], []
+        for i in range(len(filas)):
+            for j in range(nc):
+                k = i * nc + j
+                if j + 1 < nc:
+                    a, b = ComponentesConexas._pares_borde(nodos(resultados[k][3][3], k),
+                                                           nodos(resultados[k + 1][3][2], k + 1), connectivity)
+                    origenes.append(a)
+                    destinos.append(b)
+            if i + 1 < len(filas):
+                # Costura horizontal completa: incluye las diagonales en las esquinas de bloque
+                inferior = np.concatenate([nodos(resultados[i * nc + j][3][1], i * nc + j) for j in range(nc)])
+                superior = np.concatenate([nodos(resultados[(i + 1) * nc + j][3][0], (i + 1) * nc + j)
+                                           for j in range(nc)])
+                a, b = ComponentesConexas._pares_borde(inferior, superior, connectivity)
+                origenes.append(a)
+                destinos.append(b)
+        
+        origenes = np.concatenate(origenes) if origenes else np.zeros(0, dtype=np.int64)
+        destinos = np.concatenate(destinos) if destinos else np.zeros(0, dtype=np.int64)
+        grafo = coo_matrix((np.ones(len(origenes), dtype=np.int8), (origenes, destinos)),
+                           shape=(total_nodos, total_nodos))
+        num_componentes, componente = connected_components(grafo, directed=False)
+        
+        # Fase 3: combinar estadísticas por componente global
+        area = np.zeros(total_nodos, dtype=np.int64)
+        izq = np.zeros(total_nodos, dtype=np.int64)
+        arr = np.zeros(total_nodos, dtype=np.int64)
+        der = np.zeros(total_nodos, dtype=np.int64)
+        aba = np.zeros(total_nodos, dtype=np.int64)
+        cx = np.zeros(total_nodos, dtype=np.float64)
+        cy = np.zeros(total_nodos, dtype=np.float64)
+        area_fondo, cx_fondo, cy_fondo = 0, 0.0, 0.0
+        bbox_fondo = [cols, rows, 0, 0]
+        
+        for k, ((y0, y1, x0, x1), (n, stats, centroids, _)) in enumerate(zip(bloques, resultados)):
+            sl = slice(bases[k], bases[k + 1])
+            area[sl] = stats[1:, cv2.CC_STAT_AREA]
+            izq[sl] = stats[1:, cv2.CC_STAT_LEFT] + x0
+            arr[sl] = stats[1:, cv2.CC_STAT_TOP] + y0
+            der[sl] = izq[sl] + stats[1:, cv2.CC_STAT_WIDTH]
+            aba[sl] = arr[sl] + stats[1:, cv2.CC_STAT_HEIGHT]
+            cx[sl] = (centroids[1:, 0] + x0) * area[sl]
+            cy[sl] = (centroids[1:, 1] + y0) * area[sl]
+            
+            a0 = int(stats[0, cv2.CC_STAT_AREA])
+            if a0 > 0:
+                area_fondo += a0
+                cx_fondo += (centroids[0, 0] + x0) * a0
+                cy_fondo += (centroids[0, 1] + y0) * a0
+                izq0, arr0, w0, h0 = stats[0, :4]
+                bbox_fondo = [min(bbox_fondo[0], izq0 + x0), min(bbox_fondo[1], arr0 + y0),
+                              max(bbox_fondo[2], izq0 + x0 + w0), max(bbox_fondo[3], arr0 + y0 + h0)]
+        
+        num_labels = num_componentes + 1
+        areas = np.bincount(componente, weights=area, minlength=num_componentes)
+        minimo_x = np.full(num_componentes, cols, dtype=np.int64)
+        minimo_y = np.full(num_componentes, rows, dtype=np.int64)
+        maximo_x = np.zeros(num_componentes, dtype=np.int64)
+        maximo_y = np.zeros(num_componentes, dtype=np.int64)
+        np.minimum.at(minimo_x, componente, izq)
+        np.minimum.at(minimo_y, componente, arr)
+        np.maximum.at(maximo_x, componente, der)
+        np.maximum.at(maximo_y, componente, aba)
+        
+        stats = np.zeros((num_labels, 5), dtype=np.int32)
+        if area_fondo > 0:
+            stats[0] = (bbox_fondo[0], bbox_fondo[1], bbox_fondo[2] - bbox_fondo[0],
+                        bbox_fondo[3] - bbox_fondo[1], area_fondo)
+        stats[1:, cv2.CC_STAT_LEFT] = minimo_x
+        stats[1:, cv2.CC_STAT_TOP] = minimo_y
+        stats[1:, cv2.CC_STAT_WIDTH] = maximo_x - minimo_x
+        stats[1:, cv2.CC_STAT_HEIGHT] = maximo_y - minimo_y
+        stats[1:, cv2.CC_STAT_AREA] = areas
+        
+        centroids = np.zeros((num_labels, 2), dtype=np.float64)
+        centroids[0] = (cx_fondo / area_fondo, cy_fondo / area_fondo) if area_fondo > 0 else np.nan
+        if num_componentes:
+            centroids[1:, 0] = np.bincount(componente, weights=cx, minlength=num_componentes) / areas
+            centroids[1:, 1] = np.bincount(componente, weights=cy, minlength=num_componentes) / areas
+        
+        # Fase 4: escribir etiquetas globales bloque a bloque con una tabla de búsqueda
+        if salida is not None:
+            for k, (y0, y1, x0, x1) in enumerate(bloques):
+                lut = np.zeros(resultados[k][0], dtype=np.int32)
+                lut[1:] = componente[bases[k]:bases[k + 1]] + 1
+                salida[y0:y1, x0:x1] = lut[salida[y0:y1, x0:x1]]
+            if isinstance(salida, np.memmap):
+                salida.flush()
+        
+        return num_labels, salida, stats, centroids
+    
+    @staticmethod
+    def analizar(imagen: np.ndarray, conectividad: int = 8, umbral: int = 127) -> AnalisisComponentes:
+        """
+        Devuelve el análisis de componentes de una imagen, reutilizándolo si ya existe.
+        
+        La clave de caché es un hash del contenido de la imagen junto con la
+        conectividad y el umbral, de modo que volver a analizar la misma
+        imagen no repite el etiquetado ni el cálculo de propiedades.
+        
+        Args:
+            imagen: Imagen en escala de grises o RGB
+            conectividad: 4 u 8
+            umbral: Umbral de binarización
+        
+        Returns:
+            AnalisisComponentes compartido (no modificar sus arrays)
+        """
+        imagen = np.ascontiguousarray(imagen)
+        huella = hashlib.blake2b(imagen.data, digest_size=16).hexdigest()
+        clave = (huella, imagen.shape, imagen.dtype.str, conectividad, umbral)
+        return ComponentesConexas._cache_analisis.obtener(
+            clave, lambda: AnalisisComponentes(imagen, conectividad, umbral)
+        )
+    
+    @staticmethod
+    def limpiar_cache():
+        """Vacía la caché de análisis."""
+        ComponentesConexas._cache_analisis.limpiar()
+    
     @staticmethod
     def colorear_componentes(labels: np.ndarray) -> np.ndarray:
         """Colorea cada componente con un color diferente."""
@@ -33,63 +340,175 @@ class ComponentesConexas:
         labeled_img[label_hue == 0] = 0
         return labeled_img
     
+    @staticmethod
+    def propiedades_regiones(labels: np.ndarray, stats: Optional[np.ndarray] = None,
+                             centroids: Optional[np.ndarray] = None,
+                             con_perimetro: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Calcula las propiedades de todas las regiones en forma de tabla columnar.
+        
+        Área, centroide y bbox se obtienen de las estadísticas de
+        connectedComponentsWithStats si se pasan, o de un único recorrido con
+        ndimage.find_objects. Perímetro y centroide se calculan sobre el
+        recorte de la bbox de cada componente, nunca sobre la imagen completa.
+        
+        Args:
+            labels: Imagen de etiquetas (0 = fondo)
+            stats: Estadísticas de connectedComponentsWithStats (fila 0 = fondo)
+            centroids: Centroides de connectedComponentsWithStats (fila 0 = fondo)
+            con_perimetro: Si se calculan perímetro y circularidad
+        
+        Returns:
+            Diccionario de columnas (una fila por etiqueta 1..N): 'etiqueta',
+            'area', 'centroide_x', 'centroide_y', 'x', 'y', 'ancho', 'alto',
+            'perimetro', 'aspect_ratio', 'circularidad'
+        """
+        if stats is not None:
+            n = len(stats) - 1
+        else:
+            n = int(labels.max()) if labels.size else 0
+        
+        tabla = {
+            'etiqueta': np.arange(1, n + 1, dtype=np.int32),
+            'area': np.zeros(n, dtype=np.int64),
+            'centroide_x': np.zeros(n, dtype=np.float64),
+            'centroide_y': np.zeros(n, dtype=np.float64),
+            'x': np.zeros(n, dtype=np.int32),
+            'y': np.zeros(n, dtype=np.int32),
+            'ancho': np.zeros(n, dtype=np.int32),
+            'alto': np.zeros(n, dtype=np.int32),
+            'perimetro': np.zeros(n, dtype=np.float64),
+            'aspect_ratio': np.zeros(n, dtype=np.float64),
+            'circularidad': np.zeros(n, dtype=np.float64)
+        }
+        if n == 0:
+            return tabla
+        
+        if stats is not None:
+            tabla['x'][:] = stats[1:, cv2.CC_STAT_LEFT]
+            tabla['y'][:] = stats[1:, cv2.CC_STAT_TOP]
+            tabla['ancho'][:] = stats[1:, cv2.CC_STAT_WIDTH]
+            tabla['alto'][:] = stats[1:, cv2.CC_STAT_HEIGHT]
+            tabla['area'][:] = stats[1:, cv2.CC_STAT_AREA]
+        else:
+            for i, sl in enumerate(ndimage.find_objects(labels, max_label=n)):
+                if sl is not None:
+                    tabla['y'][i], tabla['x'][i] = sl[0].start, sl[1].start
+                    tabla['alto'][i] = sl[0].stop - sl[0].start
+                    tabla['ancho'][i] = sl[1].stop - sl[1].start
+        
+        calcular_momentos = stats is None or centroids is None
+        if calcular_momentos or con_perimetro:
+            for i in np.flatnonzero(tabla['ancho']):
+                x, y = tabla['x'][i], tabla['y'][i]
+                w, h = tabla['ancho'][i], tabla['alto'][i]
+                
+                # Recorte con un píxel de margen para que el contorno no toque el borde
+                roi = np.zeros((h + 2, w + 2), dtype=np.uint8)
+                roi[1:-1, 1:-1] = labels[y:y + h, x:x + w] == i + 1
+                
+                if calcular_momentos:
+                    M = cv2.moments(roi, binaryImage=True)
+                    tabla['area'][i] = int(M['m00'])
+                    tabla['centroide_x'][i] = M['m10'] / M['m00'] - 1 + x
+                    tabla['centroide_y'][i] = M['m01'] / M['m00'] - 1 + y
+                
+                if con_perimetro:
+                    contours, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                    if contours:
+                        tabla['perimetro'][i] = cv2.arcLength(contours[0], True)
+        
+        if not calcular_momentos:
+            tabla['centroide_x'][:] = centroids[1:, 0]
+            tabla['centroide_y'][:] = centroids[1:, 1]
+        
+        alto = tabla['alto']
+        np.divide(tabla['ancho'], alto, out=tabla['aspect_ratio'], where=alto > 0)
+        
+        perimetro = tabla['perimetro']
+        np.divide(4 * np.pi * tabla['area'], perimetro ** 2, out=tabla['circularidad'], where=perimetro > 0)
+        
+        return tabla
+    
     @staticmethod
     def obtener_estadisticas_componentes(labels: np.ndarray) -> List[Dict]:
-        """Calcula estadísticas de cada componente."""
+        """
+        Calcula estadísticas de cada componente.
+        
+        Mantiene el formato de lista de diccionarios a partir de la tabla
+        de propiedades_regiones.
+        """
+        tabla = ComponentesConexas.propiedades_regiones(labels)
         estadisticas = []
         
-        for lab in range(1, labels.max() + 1):
-            mask = (labels == lab).astype(np.uint8)
-            area = np.sum(mask)
-            
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            perimetro = cv2.arcLength(contours[0], True) if contours else 0
-            
-            M = cv2.moments(mask)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-            else:
-                cx, cy = 0, 0
-            
-            if contours:
-                x, y, w, h = cv2.boundingRect(contours[0])
-                aspect_ratio = float(w) / h if h > 0 else 0
-            else:
-                x, y, w, h = 0, 0, 0, 0
-                aspect_ratio = 0
-            
-            circularidad = (4 * np.pi * area) / (perimetro ** 2) if perimetro > 0 else 0
-            
+        for i in range(len(tabla['etiqueta'])):
+            area = int(tabla['area'][i])
             estadisticas.append({
-                'etiqueta': lab,
+                'etiqueta': int(tabla['etiqueta'][i]),
                 'area': area,
-                'perimetro': perimetro,
-                'centroide': (cx, cy),
-                'bbox': (x, y, w, h),
-                'aspect_ratio': aspect_ratio,
-                'circularidad': circularidad
+                'perimetro': float(tabla['perimetro'][i]),
+                'centroide': (int(tabla['centroide_x'][i]), int(tabla['centroide_y'][i])) if area else (0, 0),
+                'bbox': (int(tabla['x'][i]), int(tabla['y'][i]), int(tabla['ancho'][i]), int(tabla['alto'][i])),
+                'aspect_ratio': float(tabla['aspect_ratio'][i]),
+                'circularidad': float(tabla['circularidad'][i])
             })
         
         return estadisticas
     
     @staticmethod
-    def filtrar_componentes_pequenas(labels: np.ndarray, area_minima: int) -> Tuple[np.ndarray, int]:
-        """Filtra componentes con área menor al umbral."""
-        labels_filtradas = labels.copy()
-        componentes_eliminadas = 0
+    def filtrar_componentes_pequenas(labels: np.ndarray, area_minima: int,
+                                     area_maxima: Optional[int] = None,
+                                     aspect_ratio_rango: Optional[Tuple[float, float]] = None,
+                                     circularidad_minima: Optional[float] = None,
+                                     tabla: Optional[Dict[str, np.ndarray]] = None) -> Tuple[np.ndarray, int]:
+        """
+        Filtra componentes con área menor al umbral y reetiqueta de forma compacta.
+        
+        Las áreas se obtienen con un único np.bincount y el reetiquetado con
+        una tabla de búsqueda (lut[labels]), por lo que el coste es lineal en
+        el número de píxeles. Los criterios de forma se evalúan sobre la
+        tabla de propiedades_regiones.
+        
+        Args:
+            labels: Imagen de etiquetas (0 = fondo)
+            area_minima: Área mínima a conservar
+            area_maxima: Área máxima a conservar (None = sin límite)
+            aspect_ratio_rango: Rango (min, max) de ancho/alto a conservar
+            circularidad_minima: Circularidad mínima a conservar
+            tabla: Tabla de propiedades_regiones ya calculada (opcional)
+        
+        Returns:
+            labels_nuevas, componentes_eliminadas
+        """
+        n = int(labels.max()) if labels.size else 0
+        if n == 0:
+            return labels.copy(), 0
+        
+        if tabla is not None:
+            areas = tabla['area']
+        else:
+            areas = np.bincount(labels.ravel(), minlength=n + 1)[1:]
+        
+        conservar = areas >= area_minima
+        if area_maxima is not None:
+            conservar &= areas <= area_maxima
         
-        for lab in range(1, labels.max() + 1):
-            area = np.sum(labels == lab)
-            if area < area_minima:
-                labels_filtradas[labels == lab] = 0
-                componentes_eliminadas += 1
+        if aspect_ratio_rango is not None or circularidad_minima is not None:
+            if tabla is None:
+                tabla = ComponentesConexas.propiedades_regiones(
+                    labels, con_perimetro=circularidad_minima is not None
+                )
+            if aspect_ratio_rango is not None:
+                conservar &= (tabla['aspect_ratio'] >= aspect_ratio_rango[0]) & \
+                             (tabla['aspect_ratio'] <= aspect_ratio_rango[1])
+            if circularidad_minima is not None:
+                conservar &= tabla['circularidad'] >= circularidad_minima
         
-        labels_unicas = np.unique(labels_filtradas)
-        labels_nuevas = np.zeros_like(labels_filtradas)
+        componentes_eliminadas = int(n - np.count_nonzero(conservar))
         
-        for idx, lab in enumerate(labels_unicas):
-            if lab != 0:
-                labels_nuevas[labels_filtradas == lab] = idx
+        # Las etiquetas sin píxeles no ocupan número en el reetiquetado compacto
+        conservar &= areas > 0
+        lut = np.zeros(n + 1, dtype=labels.dtype)
+        lut[1:][conservar] = np.arange(1, np.count_nonzero(conservar) + 1)
         
-        return labels_nuevas, componentes_eliminadas
+        return lut[labels], componentes_eliminadas
@@ -5,5 +5,7 @@ Módulo de procesamiento básico
 from .brillo import AjusteBrillo
 from .segmentacion import Segmentacion
 from .umbralizacion import Umbralizacion
+from .umbrales_histograma import UmbralesHistograma
+from .cadena_puntual import CadenaPuntual
 
-__all__ = ['AjusteBrillo', 'Segmentacion', 'Umbralizacion']
+__all__ = ['AjusteBrillo', 'Segmentacion', 'Umbralizacion', 'UmbralesHistograma', 'CadenaPuntual']
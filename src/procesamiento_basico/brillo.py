@@ -3,8 +3,12 @@ Módulo de ajuste de brillo y ecualización de histogramas
 """
 
 import cv2
+import hashlib
+import threading
 import numpy as np
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+from src.utilidades.cache_lru import CacheLRU
 
 
 class AjusteBrillo:
@@ -12,6 +16,24 @@ class AjusteBrillo:
     Clase para aplicar técnicas de ajuste de brillo y ecualización.
     """
     
+    # Tablas de 256 entradas de las transformaciones puntuales, por nombre y parámetros
+    _cache_lut = CacheLRU(max_bytes=16 * 1024**2, max_elementos=512)
+    
+    # CDF de referencia para la especificación de histograma, por huella del contenido
+    _cache_cdf = CacheLRU(max_bytes=16 * 1024**2, max_elementos=256)
+    
+    # Instancias de cv2.CLAHE por (clip_limit, tile_grid_size, hilo): apply no admite llamadas concurrentes
+    _cache_clahe = CacheLRU(max_elementos=64)
+    
+    # Espacios luma/croma para el modo en luminancia: (RGB -> espacio, espacio -> RGB)
+    ESPACIOS_LUMINANCIA = {
+        'ycrcb': (cv2.COLOR_RGB2YCrCb, cv2.COLOR_YCrCb2RGB),
+        'lab': (cv2.COLOR_RGB2Lab, cv2.COLOR_Lab2RGB)
+    }
+    
+    # Planos de trabajo del modo en luminancia, uno por hilo
+    _planos = threading.local()
+    
     @staticmethod
     def _convertir_a_gris(imagen: np.ndarray) -> np.ndarray:
         """Convierte imagen a escala de grises si es necesario."""
@@ -19,6 +41,100 @@ class AjusteBrillo:
             return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
         return imagen
     
+    @staticmethod
+    def lut(clave: Hashable, funcion: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Devuelve la tabla de 256 entradas de una transformación puntual, en caché.
+        
+        La tabla se obtiene evaluando la función sobre los 256 niveles uint8,
+        por lo que coincide exactamente con aplicarla píxel a píxel.
+        
+        Args:
+            clave: Identificador de la transformación y sus parámetros
+            funcion: Transformación uint8 -> uint8 vectorizada
+        
+        Returns:
+            Tabla uint8 (256,) de solo lectura
+        """
+        return AjusteBrillo._cache_lut.obtener(
+            clave, lambda: np.asarray(funcion(np.arange(256, dtype=np.uint8))).astype(np.uint8)
+        )
+    
+    @staticmethod
+    def _aplicar_transformacion(imagen: np.ndarray, clave: Hashable,
+                                funcion: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """Aplica una transformación puntual: con cv2.LUT si la imagen es uint8, directamente si no."""
+        if imagen.dtype != np.uint8:
+            return funcion(imagen)
+        return cv2.LUT(imagen, AjusteBrillo.lut(clave, funcion))
+    
+    @staticmethod
+    def _exponencial(x: np.ndarray) -> np.ndarray:
+        """Transformación exponencial: 255·(1 - e^(-x/255))."""
+        return np.uint8(255 * (1 - np.exp(-x / 255)))
+    
+    @staticmethod
+    def _rayleigh(x: np.ndarray) -> np.ndarray:
+        """Transformación Rayleigh: 255·√(x/255)."""
+        return np.uint8(255 * np.sqrt(x / 255))
+    
+    @staticmethod
+    def _hipercubica(x: np.ndarray) -> np.ndarray:
+        """Transformación hipercúbica: 255·(x/255)⁴."""
+        return np.uint8(255 * (x / 255) ** 4)
+    
+    @staticmethod
+    def _logaritmica_hiperbolica(x: np.ndarray) -> np.ndarray:
+        """Transformación logarítmica: 255·log(1+x)/log(256)."""
+        return np.uint8(255 * np.log1p(x) / np.log1p(255))
+    
+    @staticmethod
+    def _planos_luminancia(shape: Tuple[int, ...], espacio: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Devuelve los planos de trabajo del hilo actual, reservándolos solo si cambia la forma o el espacio."""
+        planos = getattr(AjusteBrillo._planos, 'buffers', None)
+        if planos is None or planos[0] != (shape, espacio):
+            planos = ((shape, espacio), np.empty(shape, dtype=np.uint8), np.empty(shape[:2], dtype=np.uint8))
+            AjusteBrillo._planos.buffers = planos
+        return planos[1], planos[2]
+    
+    @staticmethod
+    def en_luminancia(imagen: np.ndarray, operacion: Callable[..., np.ndarray], *args,
+                      espacio: str = 'ycrcb', **kwargs) -> np.ndarray:
+        """
+        Aplica una operación de brillo solo a la luminancia, conservando el color.
+        
+        La imagen RGB se convierte una vez al espacio luma/croma, la operación
+        se aplica al plano de luma y el resultado se vuelve a combinar con la
+        croma original. Los planos intermedios se reutilizan entre llamadas
+        con la misma forma. Las imágenes en escala de grises se procesan
+        directamente.
+        
+        Args:
+            imagen: Imagen RGB uint8 o en escala de grises
+            operacion: Función imagen -> imagen, p. ej. AjusteBrillo.clahe
+            *args: Argumentos posicionales de la operación
+            espacio: 'ycrcb' o 'lab'
+            **kwargs: Argumentos con nombre de la operación
+        
+        Returns:
+            Imagen RGB con la luminancia transformada
+        """
+        if espacio not in AjusteBrillo.ESPACIOS_LUMINANCIA:
+            raise ValueError(f'Espacio de color desconocido: {espacio}')
+        if len(imagen.shape) == 2:
+            return operacion(imagen, *args, **kwargs)
+        if imagen.shape[2] != 3 or imagen.dtype != np.uint8:
+            raise ValueError(f'Se esperaba una imagen RGB uint8: {imagen.shape}, {imagen.dtype}')
+        
+        directa, inversa = AjusteBrillo.ESPACIOS_LUMINANCIA[espacio]
+        convertida, luma = AjusteBrillo._planos_luminancia(imagen.shape, espacio)
+        
+        cv2.cvtColor(imagen, directa, dst=convertida)
+        cv2.extractChannel(convertida, 0, dst=luma)
+        resultado = operacion(luma, *args, **kwargs)
+        cv2.insertChannel(resultado, convertida, 0)
+        return cv2.cvtColor(convertida, inversa)
+    
     @staticmethod
     def ecualizacion_uniforme(imagen: np.ndarray) -> np.ndarray:
         """
@@ -45,7 +161,7 @@ class AjusteBrillo:
             Imagen con ecualización exponencial
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        return np.uint8(255 * (1 - np.exp(-imagen / 255)))
+        return AjusteBrillo._aplicar_transformacion(imagen, ('exponencial',), AjusteBrillo._exponencial)
     
     @staticmethod
     def ecualizacion_rayleigh(imagen: np.ndarray) -> np.ndarray:
@@ -59,7 +175,7 @@ class AjusteBrillo:
             Imagen con ecualización Rayleigh
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        return np.uint8(255 * np.sqrt(imagen / 255))
+        return AjusteBrillo._aplicar_transformacion(imagen, ('rayleigh',), AjusteBrillo._rayleigh)
     
     @staticmethod
     def ecualizacion_hipercubica(imagen: np.ndarray) -> np.ndarray:
@@ -73,7 +189,7 @@ class AjusteBrillo:
             Imagen con ecualización hipercúbica
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        return np.uint8(255 * (imagen / 255) ** 4)
+        return AjusteBrillo._aplicar_transformacion(imagen, ('hipercubica',), AjusteBrillo._hipercubica)
     
     @staticmethod
     def ecualizacion_logaritmica_hiperbolica(imagen: np.ndarray) -> np.ndarray:
@@ -87,7 +203,8 @@ class AjusteBrillo:
             Imagen con ecualización logarítmica hiperbólica
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        return np.uint8(255 * np.log1p(imagen) / np.log1p(255))
+        return AjusteBrillo._aplicar_transformacion(imagen, ('logaritmica_hiperbolica',),
+                                                    AjusteBrillo._logaritmica_hiperbolica)
     
     @staticmethod
     def funcion_potencia(imagen: np.ndarray, potencia: float = 2.0) -> np.ndarray:
@@ -102,7 +219,8 @@ class AjusteBrillo:
             Imagen con función potencia aplicada
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        return np.uint8(255 * (imagen / 255) ** potencia)
+        return AjusteBrillo._aplicar_transformacion(imagen, ('potencia', potencia),
+                                                    lambda x: np.uint8(255 * (x / 255) ** potencia))
     
     @staticmethod
     def correccion_gamma(imagen: np.ndarray, gamma: float) -> np.ndarray:
@@ -117,11 +235,77 @@ class AjusteBrillo:
             Imagen con corrección gamma aplicada
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        imagen_gamma = np.power(imagen / 255.0, gamma) * 255
-        return np.uint8(imagen_gamma)
+        return AjusteBrillo._aplicar_transformacion(imagen, ('gamma', gamma),
+                                                    lambda x: np.uint8(np.power(x / 255.0, gamma) * 255))
+    
+    @staticmethod
+    def _instancia_clahe(clip_limit: float, tile_grid_size: Tuple[int, int]) -> cv2.CLAHE:
+        """Devuelve el objeto CLAHE del hilo actual para unos parámetros, creado una sola vez."""
+        clave = (float(clip_limit), (int(tile_grid_size[0]), int(tile_grid_size[1])), threading.get_ident())
+        return AjusteBrillo._cache_clahe.obtener(
+            clave, lambda: cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=clave[1])
+        )
+    
+    @staticmethod
+    def _clahe_bandas(imagen: np.ndarray, clip_limit: float, tile_grid_size: Tuple[int, int],
+                      bandas: int, max_workers: Optional[int]) -> np.ndarray:
+        """
+        Aplica CLAHE por bandas horizontales de azulejos en paralelo.
+        
+        Cada banda se amplía un azulejo por arriba y por abajo y se alinea con
+        la cuadrícula de la imagen completa, rellenando con BORDER_REFLECT_101
+        igual que OpenCV cuando las dimensiones no son múltiplo de la
+        cuadrícula. Así los azulejos y sus tablas coinciden con los globales y
+        basta recortar el solape: el resultado difiere del de la imagen
+        completa a lo sumo en un nivel por redondeo de la interpolación.
+        
+        Args:
+            imagen: Imagen en escala de grises
+            clip_limit: Límite de contraste
+            tile_grid_size: Cuadrícula (azulejos_x, azulejos_y)
+            bandas: Número de bandas (como máximo uno por fila de azulejos)
+            max_workers: Hilos del pool (None = por defecto de ThreadPoolExecutor)
+        
+        Returns:
+            Imagen con CLAHE aplicado
+        """
+        alto, ancho = imagen.shape
+        azulejos_x, azulejos_y = int(tile_grid_size[0]), int(tile_grid_size[1])
+        
+        # OpenCV rellena ambos ejes si alguno no es múltiplo de la cuadrícula
+        if alto % azulejos_y or ancho % azulejos_x:
+            relleno_y = azulejos_y - alto % azulejos_y
+            relleno_x = azulejos_x - ancho % azulejos_x
+        else:
+            relleno_y = relleno_x = 0
+        alto_azulejo = (alto + relleno_y) // azulejos_y
+        
+        limites = np.unique(np.linspace(0, azulejos_y, min(bandas, azulejos_y) + 1).round().astype(int))
+        # La última banda debe tener filas suficientes para reflejar el relleno inferior
+        if len(limites) <= 2 or relleno_y >= alto - (limites[-2] - 1) * alto_azulejo:
+            return AjusteBrillo._instancia_clahe(clip_limit, tile_grid_size).apply(imagen)
+        
+        salida = np.empty_like(imagen)
+        
+        def procesar(t0: int, t1: int):
+            a, b = max(t0 - 1, 0), min(t1 + 1, azulejos_y)
+            y0, y1 = a * alto_azulejo, min(b * alto_azulejo, alto)
+            banda = imagen[y0:y1]
+            relleno_abajo = b * alto_azulejo - y1
+            if relleno_abajo or relleno_x:
+                banda = cv2.copyMakeBorder(banda, 0, relleno_abajo, 0, relleno_x, cv2.BORDER_REFLECT_101)
+            resultado = AjusteBrillo._instancia_clahe(clip_limit, (azulejos_x, b - a)).apply(banda)
+            
+            inicio, fin = t0 * alto_azulejo, min(t1 * alto_azulejo, alto)
+            salida[inicio:fin] = resultado[inicio - y0:fin - y0, :ancho]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(procesar, limites[:-1], limites[1:]))
+        return salida
     
     @staticmethod
-    def clahe(imagen: np.ndarray, clip_limit: float = 2.0, tile_grid_size: Tuple[int, int] = (8, 8)) -> np.ndarray:
+    def clahe(imagen: np.ndarray, clip_limit: float = 2.0, tile_grid_size: Tuple[int, int] = (8, 8),
+              bandas: int = 1, max_workers: Optional[int] = None) -> np.ndarray:
         """
         Aplica CLAHE (Contrast Limited Adaptive Histogram Equalization).
         
@@ -129,13 +313,18 @@ class AjusteBrillo:
             imagen: Imagen de entrada
             clip_limit: Límite de contraste
             tile_grid_size: Tamaño de la cuadrícula de azulejos
-            
+            bandas: Bandas horizontales procesadas en paralelo (1 = imagen completa).
+                Cada banda procesa un azulejo extra por arriba y por abajo, por
+                lo que conviene usar bandas de varios azulejos en imágenes grandes
+            max_workers: Hilos para el modo por bandas
+        
         Returns:
             Imagen con CLAHE aplicado
         """
         imagen = AjusteBrillo._convertir_a_gris(imagen)
-        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
-        return clahe.apply(imagen)
+        if bandas > 1:
+            return AjusteBrillo._clahe_bandas(imagen, clip_limit, tile_grid_size, bandas, max_workers)
+        return AjusteBrillo._instancia_clahe(clip_limit, tile_grid_size).apply(imagen)
     
     @staticmethod
     def normalizacion(imagen: np.ndarray, rango_min: int = 0, rango_max: int = 255) -> np.ndarray:
@@ -154,17 +343,162 @@ class AjusteBrillo:
         return cv2.normalize(imagen, None, rango_min, rango_max, cv2.NORM_MINMAX)
     
     @staticmethod
-    def realce_adaptativo(imagen: np.ndarray, clip_limit: float = 3.0) -> np.ndarray:
+    def realce_adaptativo(imagen: np.ndarray, clip_limit: float = 3.0, bandas: int = 1,
+                          max_workers: Optional[int] = None) -> np.ndarray:
         """
         Aplica realce adaptativo de contraste.
         
         Args:
             imagen: Imagen de entrada
             clip_limit: Límite de contraste
-            
+            bandas: Bandas horizontales procesadas en paralelo (1 = imagen completa)
+            max_workers: Hilos para el modo por bandas
+        
         Returns:
             Imagen con realce adaptativo
         """
-        imagen = AjusteBrillo._convertir_a_gris(imagen)
-        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(16, 16))
-        return clahe.apply(imagen)
+        return AjusteBrillo.clahe(imagen, clip_limit, (16, 16), bandas=bandas, max_workers=max_workers)
+    
+    @staticmethod
+    def _histogramas_canales(imagen: np.ndarray) -> np.ndarray:
+        """Histogramas de 256 niveles de cada canal de una imagen uint8, forma (canales, 256)."""
+        if imagen.dtype != np.uint8:
+            raise ValueError(f'Tipo de imagen no soportado: {imagen.dtype}')
+        canales = 1 if len(imagen.shape) == 2 else imagen.shape[2]
+        return np.stack([cv2.calcHist([imagen], [c], None, [256], [0, 256]).ravel() for c in range(canales)])
+    
+    @staticmethod
+    def _cdf(histogramas: np.ndarray) -> np.ndarray:
+        """CDF normalizada de cada fila de unos histogramas (canales, 256)."""
+        acumulado = np.cumsum(np.asarray(histogramas, dtype=np.float64), axis=-1)
+        total = acumulado[..., -1:]
+        if np.any(total <= 0):
+            raise ValueError('El histograma de referencia está vacío')
+        return acumulado / total
+    
+    @staticmethod
+    def cdf_referencia(referencia: Optional[np.ndarray] = None,
+                       histograma: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Devuelve la CDF de una imagen o histograma de referencia, en caché.
+        
+        La clave es un hash del contenido, de modo que normalizar muchas
+        imágenes contra la misma referencia calcula su CDF una sola vez.
+        
+        Args:
+            referencia: Imagen de referencia uint8 (gris o color)
+            histograma: Histograma objetivo (256,) o (canales, 256), alternativo a la imagen
+        
+        Returns:
+            CDF (canales, 256) de solo lectura
+        """
+        if (referencia is None) == (histograma is None):
+            raise ValueError('Se debe indicar una imagen de referencia o un histograma objetivo')
+        
+        if referencia is not None:
+            datos = np.ascontiguousarray(referencia)
+            crear = lambda: AjusteBrillo._cdf(AjusteBrillo._histogramas_canales(datos))
+        else:
+            datos = np.ascontiguousarray(np.atleast_2d(histograma), dtype=np.float64)
+            if len(datos.shape) != 2 or datos.shape[1] != 256:
+                raise ValueError(f'Forma de histograma no válida: {np.shape(histograma)}')
+            crear = lambda: AjusteBrillo._cdf(datos)
+        
+        huella = hashlib.blake2b(datos.data, digest_size=16).hexdigest()
+        clave = (referencia is None, huella, datos.shape, datos.dtype.str)
+        return AjusteBrillo._cache_cdf.obtener(clave, crear)
+    
+    @staticmethod
+    def lut_especificacion(cdf_origen: np.ndarray, cdf_objetivo: np.ndarray) -> np.ndarray:
+        """
+        Construye las tablas de especificación invirtiendo la CDF objetivo.
+        
+        Cada nivel r se lleva al menor nivel z con CDF_objetivo(z) >= CDF_origen(r).
+        
+        Args:
+            cdf_origen: CDF de la imagen (256,) o (canales, 256)
+            cdf_objetivo: CDF objetivo (256,) o (canales, 256); una sola fila vale para todos los canales
+        
+        Returns:
+            Tablas uint8 (canales, 256)
+        """
+        cdf_origen, cdf_objetivo = np.broadcast_arrays(np.atleast_2d(cdf_origen), np.atleast_2d(cdf_objetivo))
+        tablas = np.empty(cdf_origen.shape, dtype=np.uint8)
+        for c in range(len(tablas)):
+            # La tolerancia evita saltar un nivel por redondeo cuando ambas CDF coinciden
+            niveles = np.searchsorted(cdf_objetivo[c], cdf_origen[c] - 1e-12, side='left')
+            tablas[c] = np.minimum(niveles, 255)
+        return tablas
+    
+    @staticmethod
+    def _especificar(imagen: np.ndarray, cdf_objetivo: np.ndarray) -> np.ndarray:
+        """Aplica la especificación de histograma con una CDF objetivo ya calculada."""
+        histogramas = AjusteBrillo._histogramas_canales(imagen)
+        if len(cdf_objetivo) not in (1, len(histogramas)):
+            raise ValueError(f'Canales incompatibles: imagen {len(histogramas)}, referencia {len(cdf_objetivo)}')
+        
+        tablas = AjusteBrillo.lut_especificacion(AjusteBrillo._cdf(histogramas), cdf_objetivo)
+        if len(tablas) == 1:
+            return cv2.LUT(imagen, tablas[0])
+        return cv2.LUT(imagen, np.ascontiguousarray(tablas.T).reshape(1, 256, len(tablas)))
+    
+    @staticmethod
+    def especificacion_histograma(imagen: np.ndarray, referencia: Optional[np.ndarray] = None,
+                                  histograma: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Aplica especificación (ajuste) de histograma hacia una referencia.
+        
+        Las imágenes en color se ajustan canal a canal; si la referencia
+        tiene un solo canal se usa la misma CDF para todos. Para conservar
+        el color ajustando solo la luminancia, combinar con en_luminancia.
+        
+        Args:
+            imagen: Imagen de entrada uint8
+            referencia: Imagen de referencia
+            histograma: Histograma objetivo (256,) o (canales, 256), alternativo a la referencia
+        
+        Returns:
+            Imagen con el histograma especificado
+        """
+        return AjusteBrillo._especificar(imagen, AjusteBrillo.cdf_referencia(referencia, histograma))
+    
+    @staticmethod
+    def especificacion_histograma_lote(imagenes: Iterable[np.ndarray], referencia: Optional[np.ndarray] = None,
+                                       histograma: Optional[np.ndarray] = None) -> Iterator[np.ndarray]:
+        """
+        Aplica especificación de histograma a una secuencia de imágenes.
+        
+        La CDF de referencia se calcula una vez; cada imagen solo requiere su
+        histograma, 256 búsquedas por canal y una aplicación de cv2.LUT.
+        
+        Args:
+            imagenes: Iterable, generador o pila (N, alto, ancho[, canales]) de imágenes uint8
+            referencia: Imagen de referencia
+            histograma: Histograma objetivo, alternativo a la referencia
+        
+        Returns:
+            Iterador de imágenes ajustadas
+        """
+        cdf_objetivo = AjusteBrillo.cdf_referencia(referencia, histograma)
+        return (AjusteBrillo._especificar(imagen, cdf_objetivo) for imagen in imagenes)
+    
+    @classmethod
+    def estadisticas_cache(cls) -> Dict[str, Dict[str, float]]:
+        """
+        Devuelve aciertos, fallos y ocupación de las cachés de ajuste de brillo.
+        
+        Returns:
+            Diccionario con las estadísticas de cada caché
+        """
+        return {
+            'lut': cls._cache_lut.estadisticas(),
+            'clahe': cls._cache_clahe.estadisticas(),
+            'cdf': cls._cache_cdf.estadisticas()
+        }
+    
+    @classmethod
+    def limpiar_cache(cls):
+        """Vacía las cachés de ajuste de brillo."""
+        cls._cache_lut.limpiar()
+        cls._cache_clahe.limpiar()
+        cls._cache_cdf.limpiar()
@@ -0,0 +1,150 @@
+"""
+Módulo de cadenas de operaciones puntuales
+Compone operaciones píxel a píxel uint8 -> uint8 en una sola tabla de búsqueda
+"""
+
+import cv2
+import numpy as np
+from typing import Any, Callable, List, Tuple
+from src.operaciones.aritmeticas import OperacionesAritmeticas
+from .brillo import AjusteBrillo
+
+
+class CadenaPuntual:
+    """
+    Secuencia de operaciones aplicada a una imagen, fusionando las puntuales.
+    
+    Las operaciones puntuales consecutivas (escalares de OperacionesAritmeticas,
+    transformaciones de AjusteBrillo) se componen en una tabla de 256
+    entradas evaluando cada etapa sobre la tabla acumulada, y se aplican con
+    un único cv2.LUT. La normalización min-max también se fusiona: el mínimo
+    y el máximo se obtienen del histograma de la imagen a través de la
+    tabla. Cualquier otra etapa (CLAHE, filtros...) corta la cadena: se
+    aplica la tabla pendiente, se ejecuta la etapa y se empieza una nueva.
+    
+    Ejemplo:
+        cadena = (CadenaPuntual()
+                  .agregar(OperacionesAritmeticas.suma_escalar, 20)
+                  .agregar(AjusteBrillo.correccion_gamma, 0.8)
+                  .agregar(AjusteBrillo.clahe)
+                  .agregar(AjusteBrillo.normalizacion))
+        resultado = cadena.aplicar(imagen)
+    """
+    
+    # Operaciones que conservan los canales y se pueden evaluar sobre la tabla
+    PUNTUALES = (
+        OperacionesAritmeticas.suma_escalar,
+        OperacionesAritmeticas.resta_escalar,
+        OperacionesAritmeticas.multiplicacion_escalar,
+        OperacionesAritmeticas.division_escalar,
+    )
+    
+    # Operaciones puntuales que además convierten a escala de grises
+    PUNTUALES_GRIS = (
+        AjusteBrillo.ecualizacion_exponencial,
+        AjusteBrillo.ecualizacion_rayleigh,
+        AjusteBrillo.ecualizacion_hipercubica,
+        AjusteBrillo.ecualizacion_logaritmica_hiperbolica,
+        AjusteBrillo.funcion_potencia,
+        AjusteBrillo.correccion_gamma,
+    )
+    
+    def __init__(self):
+        """Inicializa una cadena vacía."""
+        self.etapas: List[Tuple[str, Callable, tuple, dict]] = []
+    
+    @staticmethod
+    def _tipo(funcion: Callable) -> str:
+        """Clasifica una etapa: 'puntual', 'puntual_gris', 'normalizacion' o 'barrera'."""
+        if funcion in CadenaPuntual.PUNTUALES:
+            return 'puntual'
+        if funcion in CadenaPuntual.PUNTUALES_GRIS:
+            return 'puntual_gris'
+        if funcion is AjusteBrillo.normalizacion:
+            return 'normalizacion'
+        return 'barrera'
+    
+    def agregar(self, funcion: Callable, *args: Any, **kwargs: Any) -> 'CadenaPuntual':
+        """
+        Añade una etapa funcion(imagen, *args, **kwargs).
+        
+        Las operaciones conocidas se fusionan; el resto corta la cadena.
+        
+        Returns:
+            La propia cadena, para encadenar llamadas
+        """
+        self.etapas.append((self._tipo(funcion), funcion, args, kwargs))
+        return self
+    
+    def agregar_puntual(self, funcion: Callable, *args: Any, **kwargs: Any) -> 'CadenaPuntual':
+        """
+        Añade una función propia declarándola puntual (uint8 -> uint8, misma forma).
+        
+        Returns:
+            La propia cadena, para encadenar llamadas
+        """
+        self.etapas.append(('puntual', funcion, args, kwargs))
+        return self
+    
+    def lut(self) -> np.ndarray:
+        """
+        Devuelve la tabla compuesta de una cadena totalmente fusionable.
+        
+        Returns:
+            Tabla uint8 (256,)
+        """
+        tabla = np.arange(256, dtype=np.uint8).reshape(1, 256)
+        for tipo, funcion, args, kwargs in self.etapas:
+            if tipo not in ('puntual', 'puntual_gris'):
+                raise ValueError(f'La etapa {funcion.__name__} depende de la imagen y no tiene tabla fija')
+            tabla = funcion(tabla, *args, **kwargs)
+        return tabla.ravel()
+    
+    def aplicar(self, imagen: np.ndarray) -> np.ndarray:
+        """
+        Aplica la cadena a una imagen.
+        
+        Args:
+            imagen: Imagen de entrada (las imágenes no uint8 se procesan etapa a etapa)
+        
+        Returns:
+            Imagen resultante
+        """
+        if imagen.dtype != np.uint8:
+            for _, funcion, args, kwargs in self.etapas:
+                imagen = funcion(imagen, *args, **kwargs)
+            return imagen
+        
+        tabla = None
+        ocupados = None
+        
+        def volcar(imagen, tabla):
+            return imagen if tabla is None else cv2.LUT(imagen, tabla)
+        
+        for tipo, funcion, args, kwargs in self.etapas:
+            if tipo == 'barrera':
+                imagen = funcion(volcar(imagen, tabla), *args, **kwargs)
+                tabla, ocupados = None, None
+                continue
+            
+            if tipo in ('puntual_gris', 'normalizacion') and len(imagen.shape) == 3:
+                # La conversión a gris no es puntual por canal: aplicar lo pendiente y convertir
+                imagen = AjusteBrillo._convertir_a_gris(volcar(imagen, tabla))
+                tabla, ocupados = None, None
+            
+            if tabla is None:
+                tabla = np.arange(256, dtype=np.uint8).reshape(1, 256)
+            
+            if tipo == 'normalizacion':
+                if ocupados is None:
+                    ocupados = np.flatnonzero(np.bincount(imagen.ravel(), minlength=256))
+                # Los niveles que no aparecen se llevan al rango real para no alterar mínimo y máximo
+                valores = tabla.ravel()[ocupados]
+                tabla = np.clip(tabla, valores.min(), valores.max())
+            
+            tabla = funcion(tabla, *args, **kwargs)
+        
+        return volcar(imagen, tabla)
+    
+    def __len__(self) -> int:
+        return len(self.etapas)
@@ -3,10 +3,11 @@ Módulo de segmentación de imágenes
 """
 
 import cv2
+import time
 import numpy as np
-from typing import Tuple
-from scipy.signal import find_peaks
-from scipy.ndimage import gaussian_filter1d
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .umbrales_histograma import UmbralesHistograma
 
 
 class Segmentacion:
@@ -33,7 +34,8 @@ class Segmentacion:
             Tupla (imagen_segmentada, umbral_utilizado)
         """
         imagen = Segmentacion._convertir_a_gris(imagen)
-        umbral, imagen_segmentada = cv2.threshold(imagen, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        umbral = UmbralesHistograma.otsu(UmbralesHistograma.histograma(imagen))
+        _, imagen_segmentada = cv2.threshold(imagen, umbral, 255, cv2.THRESH_BINARY)
         return imagen_segmentada, float(umbral)
     
     @staticmethod
@@ -48,37 +50,14 @@ class Segmentacion:
         Returns:
             Umbral óptimo
         """
-        max_entropia = -1
-        umbral_optimo = 0
-        
-        prob = histograma / total_pixeles
-        
-        for t in range(1, 255):
-            w0 = np.sum(prob[:t])
-            w1 = np.sum(prob[t:])
-            
-            if w0 == 0 or w1 == 0:
-                continue
-            
-            h0 = 0
-            for i in range(t):
-                if prob[i] > 0:
-                    p_i_w0 = prob[i] / w0
-                    h0 -= p_i_w0 * np.log(p_i_w0)
-            
-            h1 = 0
-            for i in range(t, 256):
-                if prob[i] > 0:
-                    p_i_w1 = prob[i] / w1
-                    h1 -= p_i_w1 * np.log(p_i_w1)
-            
-            entropia_total = h0 + h1
-            
-            if entropia_total > max_entropia:
-                max_entropia = entropia_total
-                umbral_optimo = t
-        
-        return umbral_optimo
+        return UmbralesHistograma.kapur(histograma)
+    
+    @staticmethod
+    def _aplicar_niveles(imagen: np.ndarray, umbrales: List[int]) -> np.ndarray:
+        """Asigna a cada píxel el nivel de su clase (número de umbrales <= valor), equiespaciados en [0, 255]."""
+        niveles = np.linspace(0, 255, len(umbrales) + 1).astype(np.uint8)
+        lut = niveles[np.searchsorted(umbrales, np.arange(256), side='right')]
+        return cv2.LUT(imagen.astype(np.uint8), lut)
     
     @staticmethod
     def segmentacion_kapur(imagen: np.ndarray) -> Tuple[np.ndarray, float]:
@@ -93,14 +72,46 @@ class Segmentacion:
         """
         imagen = Segmentacion._convertir_a_gris(imagen)
         
-        histograma, _ = np.histogram(imagen, bins=256, range=(0, 256))
-        total_pixeles = imagen.size
-        
-        umbral = Segmentacion._entropia_kapur(histograma, total_pixeles)
+        histograma = UmbralesHistograma.histograma(imagen)
+        umbral = UmbralesHistograma.kapur(histograma)
         imagen_segmentada = (imagen > umbral).astype(np.uint8) * 255
         
         return imagen_segmentada, float(umbral)
     
+    @staticmethod
+    def segmentacion_kapur_multinivel(imagen: np.ndarray, n_umbrales: int = 2) -> Tuple[np.ndarray, List[int]]:
+        """
+        Aplica segmentación multinivel por entropía de Kapur.
+        
+        Args:
+            imagen: Imagen de entrada
+            n_umbrales: Número de umbrales (2 a 4 habitualmente)
+        
+        Returns:
+            Tupla (imagen_segmentada con n_umbrales + 1 niveles equiespaciados, umbrales)
+        """
+        imagen = Segmentacion._convertir_a_gris(imagen)
+        
+        umbrales = UmbralesHistograma.kapur_multinivel(UmbralesHistograma.histograma(imagen), n_umbrales)
+        return Segmentacion._aplicar_niveles(imagen, umbrales), umbrales
+    
+    @staticmethod
+    def segmentacion_otsu_multinivel(imagen: np.ndarray, n_umbrales: int = 2) -> Tuple[np.ndarray, List[int]]:
+        """
+        Aplica segmentación por Otsu multinivel.
+        
+        Args:
+            imagen: Imagen de entrada
+            n_umbrales: Número de umbrales (2 a 4 habitualmente)
+        
+        Returns:
+            Tupla (imagen_segmentada con n_umbrales + 1 niveles equiespaciados, umbrales)
+        """
+        imagen = Segmentacion._convertir_a_gris(imagen)
+        
+        umbrales = UmbralesHistograma.otsu_multinivel(UmbralesHistograma.histograma(imagen), n_umbrales)
+        return Segmentacion._aplicar_niveles(imagen, umbrales), umbrales
+    
     @staticmethod
     def segmentacion_minimo_histograma(imagen: np.ndarray) -> Tuple[np.ndarray, float]:
         """
@@ -114,21 +125,7 @@ class Segmentacion:
         """
         imagen = Segmentacion._convertir_a_gris(imagen)
         
-        histograma, _ = np.histogram(imagen, bins=256, range=(0, 256))
-        histograma_suavizado = gaussian_filter1d(histograma.astype(float), sigma=2)
-        
-        picos, propiedades = find_peaks(histograma_suavizado, prominence=np.max(histograma_suavizado)*0.1)
-        
-        if len(picos) >= 2:
-            prominencias = propiedades['prominences']
-            indices_ordenados = np.argsort(prominencias)[::-1]
-            dos_picos_principales = np.sort(picos[indices_ordenados[:2]])
-            
-            region = histograma_suavizado[dos_picos_principales[0]:dos_picos_principales[1]+1]
-            minimo = np.argmin(region) + dos_picos_principales[0]
-        else:
-            minimo, _ = cv2.threshold(imagen, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            minimo = int(minimo)
+        minimo = UmbralesHistograma.minimo(UmbralesHistograma.histograma(imagen))
         
         imagen_segmentada = (imagen > minimo).astype(np.uint8) * 255
         
@@ -147,26 +144,30 @@ class Segmentacion:
         """
         imagen = Segmentacion._convertir_a_gris(imagen)
         
-        umbral = np.mean(imagen)
-        imagen_segmentada = (imagen >= umbral).astype(np.uint8) * 255
+        umbral = UmbralesHistograma.media(UmbralesHistograma.histograma(imagen))
+        imagen_segmentada = UmbralesHistograma.binarizar(imagen, umbral, 'media')
         
         return imagen_segmentada, float(umbral)
     
     @staticmethod
-    def segmentacion_multiples_umbrales(imagen: np.ndarray, T1: int, T2: int) -> np.ndarray:
+    def segmentacion_multiples_umbrales(imagen: np.ndarray, T1: Optional[int] = None,
+                                        T2: Optional[int] = None) -> np.ndarray:
         """
         Aplica segmentación por múltiples umbrales.
         
         Args:
             imagen: Imagen de entrada
-            T1: Primer umbral
-            T2: Segundo umbral
+            T1: Primer umbral (None = Otsu multinivel)
+            T2: Segundo umbral (None = Otsu multinivel)
             
         Returns:
             Imagen segmentada con tres niveles
         """
         imagen = Segmentacion._convertir_a_gris(imagen)
         
+        if T1 is None or T2 is None:
+            T1, T2 = UmbralesHistograma.otsu_multinivel(UmbralesHistograma.histograma(imagen), 2)
+        
         imagen_segmentada = np.zeros_like(imagen)
         imagen_segmentada[imagen < T1] = 0
         imagen_segmentada[(imagen >= T1) & (imagen < T2)] = 127
@@ -195,19 +196,296 @@ class Segmentacion:
         return imagen_segmentada
     
     @staticmethod
-    def segmentacion_kmeans(imagen: np.ndarray, k: int = 3) -> np.ndarray:
+    def _kmeans_histograma(histograma: np.ndarray, k: int, max_iter: int = 100) -> np.ndarray:
+        """
+        K-means de Lloyd sobre los niveles de gris ponderados por su frecuencia.
+        
+        Equivale a agrupar todos los píxeles, pero cada iteración recorre
+        solo los 256 niveles. Los centros se inicializan en los cuantiles
+        del histograma, por lo que el resultado es determinista.
+        
+        Args:
+            histograma: Histograma de 256 niveles
+            k: Número de clusters
+            max_iter: Iteraciones máximas
+        
+        Returns:
+            Centros ordenados (k,)
+        """
+        niveles = np.arange(len(histograma), dtype=np.float64)
+        pesos = np.asarray(histograma, dtype=np.float64)
+        cdf = np.cumsum(pesos) / pesos.sum()
+        centros = niveles[np.searchsorted(cdf, (np.arange(k) + 0.5) / k)]
+        
+        for _ in range(max_iter):
+            # En 1-D el vecino más cercano queda delimitado por los puntos medios entre centros
+            centros = np.sort(centros)
+            asignacion = np.searchsorted((centros[:-1] + centros[1:]) / 2, niveles)
+            suma = np.bincount(asignacion, weights=pesos * niveles, minlength=k)
+            peso = np.bincount(asignacion, weights=pesos, minlength=k)
+            nuevos = np.where(peso > 0, suma / np.maximum(peso, 1e-12), centros)
+            if np.allclose(nuevos, centros):
+                break
+            centros = nuevos
+        
+        return np.sort(centros)
+    
+    @staticmethod
+    def _kmeans_optimo(histograma: np.ndarray, k: int) -> np.ndarray:
+        """
+        K-means 1-D exacto sobre el histograma.
+        
+        Minimizar la suma de errores cuadráticos equivale a maximizar
+        Σ M_c² / W_c, que es el criterio de Otsu multinivel, así que se
+        reutiliza su programación dinámica.
+        
+        Returns:
+            Centros ordenados (k,)
+        """
+        if k == 1:
+            return np.array([UmbralesHistograma.media(histograma)])
+        
+        umbrales = UmbralesHistograma.otsu_multinivel(histograma, k - 1)
+        niveles = np.arange(len(histograma), dtype=np.float64)
+        pesos = np.asarray(histograma, dtype=np.float64)
+        clase = np.searchsorted(umbrales, niveles, side='right')
+        suma = np.bincount(clase, weights=pesos * niveles, minlength=k)
+        peso = np.bincount(clase, weights=pesos, minlength=k)
+        
+        # Clases vacías (menos niveles ocupados que k): centro en el medio de su intervalo
+        limites = np.concatenate(([0], umbrales, [len(histograma)]))
+        return np.where(peso > 0, suma / np.maximum(peso, 1e-12), (limites[:-1] + limites[1:] - 1) / 2)
+    
+    @staticmethod
+    def _asignar_centros(datos: np.ndarray, centros: np.ndarray, tam_bloque: int = 1 << 18) -> np.ndarray:
+        """
+        Índice del centro más cercano para cada fila de datos, por bloques para acotar la memoria.
+        
+        Args:
+            datos: Puntos (N, d)
+            centros: Centros (k, d)
+            tam_bloque: Filas procesadas a la vez
+        
+        Returns:
+            Etiquetas (N,)
+        """
+        centros = centros.astype(np.float32)
+        norma_centros = (centros**2).sum(axis=1)
+        etiquetas = np.empty(len(datos), dtype=np.int32)
+        for inicio in range(0, len(datos), tam_bloque):
+            bloque = datos[inicio:inicio + tam_bloque].astype(np.float32)
+            # ||x - c||² = ||x||² - 2 x·c + ||c||²; ||x||² no cambia el mínimo
+            distancias = norma_centros - 2 * bloque @ centros.T
+            etiquetas[inicio:inicio + tam_bloque] = np.argmin(distancias, axis=1)
+        return etiquetas
+    
+    @staticmethod
+    def _kmeans_minibatch(datos: np.ndarray, k: int, tam_lote: int = 1024, iteraciones: int = 100,
+                          semilla: Optional[int] = None) -> np.ndarray:
+        """
+        K-means por mini-lotes (Sculley, 2010).
+        
+        Los centros se inicializan con k-means++ sobre una muestra y en cada
+        iteración se mueven hacia la media de los puntos de un lote aleatorio
+        con paso 1/n, siendo n los puntos acumulados por cada centro.
+        
+        Args:
+            datos: Puntos (N, d)
+            k: Número de clusters
+            tam_lote: Puntos por lote
+            iteraciones: Número de lotes
+            semilla: Semilla del generador aleatorio
+        
+        Returns:
+            Centros (k, d)
+        """
+        rng = np.random.default_rng(semilla)
+        n = len(datos)
+        
+        muestra = datos[rng.integers(0, n, min(n, 10 * tam_lote))].astype(np.float64)
+        centros = [muestra[rng.integers(len(muestra))]]
+        distancia = ((muestra - centros[0])**2).sum(axis=1)
+        for _ in range(1, k):
+            total = distancia.sum()
+            elegido = rng.choice(len(muestra), p=distancia / total) if total > 0 else rng.integers(len(muestra))
+            centros.append(muestra[elegido])
+            distancia = np.minimum(distancia, ((muestra - muestra[elegido])**2).sum(axis=1))
+        centros = np.array(centros)
+        
+        conteos = np.zeros(k)
+        for _ in range(iteraciones):
+            lote = datos[rng.integers(0, n, tam_lote)].astype(np.float64)
+            etiquetas = Segmentacion._asignar_centros(lote, centros)
+            cuenta_lote = np.bincount(etiquetas, minlength=k)
+            suma_lote = np.zeros_like(centros)
+            np.add.at(suma_lote, etiquetas, lote)
+            conteos += cuenta_lote
+            activos = cuenta_lote > 0
+            centros[activos] += (suma_lote[activos] - cuenta_lote[activos, None] * centros[activos]) / \
+                conteos[activos, None]
+        
+        return centros
+    
+    @staticmethod
+    def _kmeans_ponderado(puntos: np.ndarray, pesos: np.ndarray, k: int, max_iter: int = 50,
+                          semilla: Optional[int] = None) -> np.ndarray:
+        """
+        K-means de Lloyd con pesos por punto e inicialización k-means++ ponderada.
+        
+        Args:
+            puntos: Puntos (N, d)
+            pesos: Peso de cada punto (N,)
+            k: Número de clusters
+            max_iter: Iteraciones máximas
+            semilla: Semilla del generador aleatorio
+        
+        Returns:
+            Centros (k, d)
+        """
+        rng = np.random.default_rng(semilla)
+        puntos = puntos.astype(np.float64)
+        pesos = pesos.astype(np.float64)
+        
+        centros = [puntos[rng.choice(len(puntos), p=pesos / pesos.sum())]]
+        distancia = ((puntos - centros[0])**2).sum(axis=1)
+        for _ in range(1, k):
+            prob = pesos * distancia
+            total = prob.sum()
+            elegido = rng.choice(len(puntos), p=prob / total) if total > 0 else rng.integers(len(puntos))
+            centros.append(puntos[elegido])
+            distancia = np.minimum(distancia, ((puntos - puntos[elegido])**2).sum(axis=1))
+        centros = np.array(centros)
+        
+        for _ in range(max_iter):
+            etiquetas = Segmentacion._asignar_centros(puntos, centros)
+            peso = np.bincount(etiquetas, weights=pesos, minlength=k)
+            suma = np.stack([np.bincount(etiquetas, weights=pesos * puntos[:, c], minlength=k)
+                             for c in range(puntos.shape[1])], axis=1)
+            nuevos = np.where(peso[:, None] > 0, suma / np.maximum(peso, 1e-12)[:, None], centros)
+            if np.allclose(nuevos, centros, atol=1e-3):
+                break
+            centros = nuevos
+        
+        return centros
+    
+    @staticmethod
+    def _indice_color(imagen: np.ndarray, bits: int = 5) -> np.ndarray:
+        """Índice de la celda de color cuantizada (2^bits niveles por canal) de cada píxel."""
+        desplazamiento = 8 - bits
+        indice = (imagen[..., 0] >> desplazamiento).astype(np.uint16)
+        indice <<= bits
+        indice |= imagen[..., 1] >> desplazamiento
+        indice <<= bits
+        indice |= imagen[..., 2] >> desplazamiento
+        return indice
+    
+    @staticmethod
+    def segmentacion_kmeans_color(imagen: np.ndarray, k: int = 4, ajuste: str = 'muestra',
+                                  tam_muestra: int = 50000,
+                                  semilla: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aplica segmentación K-means en el espacio de color.
+        
+        Los centros se ajustan sobre una muestra aleatoria de píxeles o sobre
+        el histograma de color cuantizado a 32x32x32 celdas. Después se
+        construye una tabla de 32^3 entradas con el centro más cercano a cada
+        celda y todos los píxeles se asignan con una única indexación, sin
+        calcular distancias por píxel.
+        
+        Args:
+            imagen: Imagen a color uint8 (H, W, 3)
+            k: Número de clusters
+            ajuste: 'muestra' (cv2.kmeans sobre tam_muestra píxeles) o 'histograma'
+            tam_muestra: Píxeles usados en el ajuste por muestra
+            semilla: Semilla del generador aleatorio
+        
+        Returns:
+            Tupla (imagen_segmentada a color, centros (k, 3))
+        """
+        if imagen.ndim != 3 or imagen.shape[2] != 3:
+            raise ValueError('La segmentación K-means a color requiere una imagen de 3 canales')
+        imagen = imagen.astype(np.uint8, copy=False)
+        indice = Segmentacion._indice_color(imagen)
+        
+        if ajuste == 'muestra':
+            rng = np.random.default_rng(semilla)
+            pixeles = imagen.reshape(-1, 3)
+            muestra = np.float32(pixeles[rng.integers(0, len(pixeles), min(tam_muestra, len(pixeles)))])
+            if semilla is not None:
+                cv2.setRNGSeed(semilla)
+            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 0.2)
+            _, _, centros = cv2.kmeans(muestra, k, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
+        elif ajuste == 'histograma':
+            # Cada celda ocupada aporta su color medio, ponderado por su número de píxeles
+            planos = imagen.reshape(-1, 3)
+            conteo = np.bincount(indice.ravel(), minlength=1 << 15)
+            ocupadas = np.flatnonzero(conteo)
+            medias = np.stack([np.bincount(indice.ravel(), weights=planos[:, c], minlength=1 << 15)[ocupadas]
+                               for c in range(3)], axis=1) / conteo[ocupadas, None]
+            centros = Segmentacion._kmeans_ponderado(medias, conteo[ocupadas], k, semilla=semilla)
+        else:
+            raise ValueError(f'Ajuste de K-means desconocido: {ajuste}')
+        
+        # Tabla celda -> centro más cercano al centro geométrico de la celda
+        celdas = np.arange(1 << 15)
+        representantes = np.stack([(celdas >> 10) & 31, (celdas >> 5) & 31, celdas & 31], axis=1) * 8 + 3.5
+        lut = Segmentacion._asignar_centros(representantes, centros)
+        
+        centros = np.uint8(np.clip(np.round(centros), 0, 255))
+        return centros[lut][indice], centros
+    
+    @staticmethod
+    def segmentacion_kmeans(imagen: np.ndarray, k: int = 3, modo: str = 'pixeles',
+                            semilla: Optional[int] = None) -> np.ndarray:
         """
         Aplica segmentación usando K-means.
         
+        Modos:
+            'pixeles': cv2.kmeans sobre todos los píxeles (gris, método original, por defecto)
+            'histograma': Lloyd sobre el histograma de 256 niveles ponderado (gris);
+                          mucho más rápido, pero las etiquetas y los empates pueden
+                          diferir de 'pixeles'
+            'optimo': k-means 1-D exacto por programación dinámica (gris)
+            'minibatch': k-means por mini-lotes; con imagen a color agrupa en el
+                         espacio de color y devuelve una imagen a color
+            'color': segmentacion_kmeans_color con ajuste por muestra (imagen a color)
+        
         Args:
             imagen: Imagen de entrada
             k: Número de clusters
-            
+            modo: 'pixeles', 'histograma', 'optimo', 'minibatch' o 'color'
+            semilla: Semilla para los modos 'minibatch' y 'color'
+        
         Returns:
-            Imagen segmentada
+            Imagen segmentada (cada píxel toma el valor de su centro)
         """
+        if modo == 'color':
+            return Segmentacion.segmentacion_kmeans_color(imagen, k, semilla=semilla)[0]
+        
+        if modo == 'minibatch':
+            datos = imagen.reshape(-1, imagen.shape[2] if imagen.ndim == 3 else 1)
+            centros = Segmentacion._kmeans_minibatch(datos, k, semilla=semilla)
+            etiquetas = Segmentacion._asignar_centros(datos, centros)
+            centros = np.uint8(np.clip(centros, 0, 255))
+            return centros[etiquetas].reshape(imagen.shape)
+        
         imagen = Segmentacion._convertir_a_gris(imagen)
         
+        if modo in ('histograma', 'optimo'):
+            histograma = UmbralesHistograma.histograma(imagen)
+            if modo == 'histograma':
+                centros = Segmentacion._kmeans_histograma(histograma, k)
+            else:
+                centros = Segmentacion._kmeans_optimo(histograma, k)
+            
+            # Tabla nivel -> centro más cercano, aplicada con una sola pasada
+            asignacion = np.argmin(np.abs(np.arange(256)[:, None] - centros[None, :]), axis=1)
+            lut = np.uint8(centros)[asignacion]
+            return cv2.LUT(imagen.astype(np.uint8), lut)
+        
+        if modo != 'pixeles':
+            raise ValueError(f'Modo de K-means desconocido: {modo}')
+        
         pixel_values = imagen.reshape((-1, 1))
         pixel_values = np.float32(pixel_values)
         
@@ -221,37 +499,116 @@ class Segmentacion:
         return segmented_image
     
     @staticmethod
-    def segmentacion_watershed(imagen: np.ndarray) -> np.ndarray:
+    def watershed_marcadores(imagen: np.ndarray, tamano_kernel: int = 3, iter_apertura: int = 2,
+                             iter_dilatacion: int = 3, fraccion_distancia: float = 0.7,
+                             mascara_distancia: int = 5, tamano_bloque: Optional[int] = None,
+                             solape: int = 64, max_workers: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, float]]:
         """
-        Aplica segmentación usando Watershed.
+        Calcula la segmentación Watershed y devuelve la imagen de marcadores.
+        
+        Etapas: umbral de Otsu invertido, apertura morfológica, transformada
+        de distancia, marcadores (componentes del primer plano seguro) y
+        watershed. La imagen de entrada no se modifica.
+        
+        En modo por bloques (tamano_bloque) las primeras etapas se calculan
+        sobre la imagen completa, de modo que los marcadores son globales, y
+        solo el watershed, la etapa más costosa, se ejecuta por bloques con
+        un margen de solape y en paralelo. Cada bloque solo escribe su parte
+        central; con un solape suficiente el resultado coincide con el global.
         
         Args:
-            imagen: Imagen de entrada
-            
+            imagen: Imagen de entrada (gris o BGR)
+            tamano_kernel: Lado del elemento estructurante
+            iter_apertura: Iteraciones de la apertura
+            iter_dilatacion: Iteraciones de la dilatación del fondo seguro
+            fraccion_distancia: Fracción del máximo de la distancia para el primer plano seguro
+            mascara_distancia: Tamaño de máscara de cv2.distanceTransform (3, 5 o 0 = exacta)
+            tamano_bloque: Lado de los bloques del watershed (None = imagen completa)
+            solape: Margen de cada bloque en píxeles
+            max_workers: Hilos para los bloques (None o 1 = secuencial)
+        
         Returns:
-            Imagen segmentada
+            Tupla (marcadores int32 con -1 en las fronteras, tiempos por etapa en segundos)
         """
+        tiempos = {}
+        inicio = time.perf_counter()
+        
         if len(imagen.shape) == 2:
             imagen = cv2.cvtColor(imagen, cv2.COLOR_GRAY2BGR)
-        
         gray = cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
-        ret, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
         
-        kernel = np.ones((3, 3), np.uint8)
-        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
+        t = time.perf_counter()
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        tiempos['umbral'] = time.perf_counter() - t
         
-        sure_bg = cv2.dilate(opening, kernel, iterations=3)
-        dist_transform = cv2.distanceTransform(opening, cv2.DIST_L2, 5)
-        ret, sure_fg = cv2.threshold(dist_transform, 0.7 * dist_transform.max(), 255, 0)
+        t = time.perf_counter()
+        kernel = np.ones((tamano_kernel, tamano_kernel), np.uint8)
+        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=iter_apertura)
+        sure_bg = cv2.dilate(opening, kernel, iterations=iter_dilatacion)
+        tiempos['apertura'] = time.perf_counter() - t
         
+        t = time.perf_counter()
+        dist_transform = cv2.distanceTransform(opening, cv2.DIST_L2, mascara_distancia)
+        tiempos['distancia'] = time.perf_counter() - t
+        
+        t = time.perf_counter()
+        _, sure_fg = cv2.threshold(dist_transform, fraccion_distancia * dist_transform.max(), 255, 0)
         sure_fg = np.uint8(sure_fg)
         unknown = cv2.subtract(sure_bg, sure_fg)
         
-        ret, markers = cv2.connectedComponents(sure_fg)
-        markers = markers + 1
+        _, markers = cv2.connectedComponents(sure_fg)
+        markers += 1
         markers[unknown == 255] = 0
+        tiempos['marcadores'] = time.perf_counter() - t
+        
+        t = time.perf_counter()
+        rows, cols = gray.shape
+        if tamano_bloque is None or (rows <= tamano_bloque and cols <= tamano_bloque):
+            markers = cv2.watershed(imagen, markers)
+        else:
+            semillas = markers
+            markers = np.empty_like(semillas)
+            
+            def procesar(origen):
+                y0, x0 = origen
+                y1, x1 = min(y0 + tamano_bloque, rows), min(x0 + tamano_bloque, cols)
+                ey0, ex0 = max(y0 - solape, 0), max(x0 - solape, 0)
+                ey1, ex1 = min(y1 + solape, rows), min(x1 + solape, cols)
+                
+                region = cv2.watershed(np.ascontiguousarray(imagen[ey0:ey1, ex0:ex1]),
+                                       semillas[ey0:ey1, ex0:ex1].copy())
+                markers[y0:y1, x0:x1] = region[y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+            
+            origenes = [(y0, x0) for y0 in range(0, rows, tamano_bloque) for x0 in range(0, cols, tamano_bloque)]
+            if max_workers is not None and max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    list(executor.map(procesar, origenes))
+            else:
+                for origen in origenes:
+                    procesar(origen)
+        tiempos['watershed'] = time.perf_counter() - t
+        
+        tiempos['total'] = time.perf_counter() - inicio
+        return markers, tiempos
+    
+    @staticmethod
+    def segmentacion_watershed(imagen: np.ndarray, **parametros) -> np.ndarray:
+        """
+        Aplica segmentación usando Watershed.
+        
+        Args:
+            imagen: Imagen de entrada (no se modifica)
+            **parametros: Parámetros de watershed_marcadores
+        
+        Returns:
+            Imagen segmentada (gris con las fronteras marcadas)
+        """
+        markers, _ = Segmentacion.watershed_marcadores(imagen, **parametros)
         
-        markers = cv2.watershed(imagen, markers)
-        imagen[markers == -1] = [255, 0, 0]
+        if len(imagen.shape) == 2:
+            resultado = cv2.cvtColor(imagen, cv2.COLOR_GRAY2BGR)
+        else:
+            resultado = imagen.copy()
+        resultado[markers == -1] = [255, 0, 0]
         
-        return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
+        return cv2.cvtColor(resultado, cv2.COLOR_BGR2GRAY)
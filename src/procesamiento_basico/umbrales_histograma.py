@@ -0,0 +1,380 @@
+"""
+Módulo de umbrales calculados sobre el histograma
+Otsu, Otsu multinivel, Kapur, media y mínimo del histograma a partir de un único histograma de 256 niveles
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from scipy.signal import find_peaks
+from scipy.ndimage import gaussian_filter1d
+
+
+class UmbralesHistograma:
+    """
+    Motor de umbralización basado en histograma.
+    
+    El histograma de 256 niveles se calcula una sola vez por imagen y todos
+    los métodos trabajan sobre él (o sobre una pila de histogramas (N, 256)
+    para procesar lotes). Los umbrales simples siguen el convenio de
+    cv2.threshold (objeto = nivel > umbral), salvo la media, que incluye el
+    propio umbral (objeto = nivel >= umbral); binarizar aplica la comparación
+    de cada método. Los multinivel indican el primer nivel de cada clase
+    (clase = número de umbrales <= nivel).
+    """
+    
+    METODOS = ('otsu', 'kapur', 'media', 'minimo')
+    
+    # Métodos cuyo objeto incluye los píxeles iguales al umbral
+    INCLUSIVOS = ('media',)
+    
+    @staticmethod
+    def histograma(imagen: np.ndarray) -> np.ndarray:
+        """
+        Calcula el histograma de 256 niveles de una imagen.
+        
+        Args:
+            imagen: Imagen en escala de grises o BGR
+        
+        Returns:
+            Conteos por nivel (256,)
+        """
+        if len(imagen.shape) == 3:
+            imagen = cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
+        if imagen.dtype == np.uint8:
+            return np.bincount(imagen.ravel(), minlength=256)
+        histograma, _ = np.histogram(imagen, bins=256, range=(0, 256))
+        return histograma
+    
+    @staticmethod
+    def histogramas(imagenes: Union[np.ndarray, Iterable[np.ndarray]]) -> np.ndarray:
+        """
+        Calcula los histogramas de una pila (N, H, W) o de un iterable de imágenes.
+        
+        Returns:
+            Array (N, 256) de conteos
+        """
+        return np.array([UmbralesHistograma.histograma(img) for img in imagenes], dtype=np.int64).reshape(-1, 256)
+    
+    @staticmethod
+    def _tablas(histograma: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tablas acumuladas sobre el último eje, con un cero inicial.
+        
+        Returns:
+            C: Conteo acumulado (para saber si un intervalo está vacío)
+            P: Probabilidad acumulada
+            M: Primer momento acumulado Σ i·p
+            S: Suma acumulada de p·log(p)
+        """
+        histograma = np.asarray(histograma, dtype=np.float64)
+        prob = histograma / histograma.sum(axis=-1, keepdims=True)
+        niveles = np.arange(histograma.shape[-1])
+        plogp = prob * np.log(prob, where=prob > 0, out=np.zeros_like(prob))
+        
+        def acumular(x):
+            ceros = np.zeros(x.shape[:-1] + (1,))
+            return np.concatenate((ceros, np.cumsum(x, axis=-1)), axis=-1)
+        
+        return acumular(histograma), acumular(prob), acumular(niveles * prob), acumular(plogp)
+    
+    @staticmethod
+    def _entropia_intervalos(C: np.ndarray, P: np.ndarray, S: np.ndarray,
+                             a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Entropía de los intervalos de niveles [a, b) sobre el último eje: log(w) - Σp·log(p) / w.
+        
+        Los intervalos sin píxeles valen -inf.
+        """
+        def tomar(X, i):
+            return np.take(X, i, axis=-1)
+        
+        w = tomar(P, b) - tomar(P, a)
+        validos = (tomar(C, b) - tomar(C, a)) > 0
+        H = np.full(validos.shape, -np.inf)
+        np.divide(tomar(S, b) - tomar(S, a), w, out=H, where=validos)
+        np.subtract(np.log(w, where=validos, out=np.zeros_like(H)), H, out=H, where=validos)
+        return H
+    
+    @staticmethod
+    def _primer_maximo(valores: np.ndarray) -> np.ndarray:
+        """Índice del primer máximo sobre el último eje, tolerando empates numéricos."""
+        maximo = valores.max(axis=-1, keepdims=True)
+        return np.argmax(valores >= maximo - 1e-12 * np.maximum(1.0, np.abs(maximo)), axis=-1)
+    
+    @staticmethod
+    def otsu(histograma: np.ndarray) -> Union[int, np.ndarray]:
+        """
+        Umbral de Otsu (máxima varianza entre clases), igual al de cv2.THRESH_OTSU.
+        
+        Args:
+            histograma: Histograma (256,) o pila de histogramas (N, 256)
+        
+        Returns:
+            Umbral (o array de N umbrales)
+        """
+        _, P, M, _ = UmbralesHistograma._tablas(histograma)
+        q1 = P[..., 1:]
+        q2 = 1.0 - q1
+        mu = M[..., -1:]
+        
+        # Mismo criterio que OpenCV para descartar clases vacías
+        eps = np.finfo(np.float32).eps
+        validos = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1.0 - eps)
+        sigma = np.zeros(q1.shape)
+        np.divide((mu * q1 - M[..., 1:])**2, q1 * q2, out=sigma, where=validos)
+        
+        umbral = UmbralesHistograma._primer_maximo(sigma)
+        umbral = np.where(validos.any(axis=-1), umbral, 0)
+        return int(umbral) if umbral.ndim == 0 else umbral
+    
+    @staticmethod
+    def kapur(histograma: np.ndarray) -> Union[int, np.ndarray]:
+        """
+        Umbral de máxima entropía de Kapur.
+        
+        Todas las posiciones se evalúan a la vez con sumas acumuladas de p y
+        de p·log(p); entre umbrales empatados se elige el primero.
+        
+        Args:
+            histograma: Histograma (256,) o pila de histogramas (N, 256)
+        
+        Returns:
+            Umbral (o array de N umbrales)
+        """
+        C, P, _, S = UmbralesHistograma._tablas(histograma)
+        t = np.arange(1, 255)
+        entropia_total = UmbralesHistograma._entropia_intervalos(C, P, S, np.zeros_like(t), t) + \
+            UmbralesHistograma._entropia_intervalos(C, P, S, t, np.full_like(t, 256))
+        
+        validos = np.isfinite(entropia_total)
+        umbral = t[UmbralesHistograma._primer_maximo(np.where(validos, entropia_total, -1.0))]
+        umbral = np.where(validos.any(axis=-1), umbral, 0)
+        return int(umbral) if umbral.ndim == 0 else umbral
+    
+    @staticmethod
+    def media(histograma: np.ndarray) -> Union[float, np.ndarray]:
+        """
+        Nivel medio de la imagen.
+        
+        Args:
+            histograma: Histograma (256,) o pila de histogramas (N, 256)
+        
+        Returns:
+            Media (o array de N medias)
+        """
+        histograma = np.asarray(histograma, dtype=np.float64)
+        media = histograma @ np.arange(histograma.shape[-1]) / histograma.sum(axis=-1)
+        return float(media) if np.ndim(media) == 0 else media
+    
+    @staticmethod
+    def minimo(histograma: np.ndarray) -> Union[int, np.ndarray]:
+        """
+        Mínimo del histograma suavizado entre sus dos picos más prominentes.
+        
+        Si no hay dos picos claros se usa el umbral de Otsu.
+        
+        Args:
+            histograma: Histograma (256,) o pila de histogramas (N, 256)
+        
+        Returns:
+            Umbral (o array de N umbrales)
+        """
+        histograma = np.asarray(histograma)
+        if histograma.ndim == 2:
+            return np.array([UmbralesHistograma.minimo(h) for h in histograma], dtype=np.int64)
+        
+        histograma_suavizado = gaussian_filter1d(histograma.astype(float), sigma=2)
+        picos, propiedades = find_peaks(histograma_suavizado, prominence=np.max(histograma_suavizado)*0.1)
+        
+        if len(picos) >= 2:
+            prominencias = propiedades['prominences']
+            indices_ordenados = np.argsort(prominencias)[::-1]
+            dos_picos_principales = np.sort(picos[indices_ordenados[:2]])
+            
+            region = histograma_suavizado[dos_picos_principales[0]:dos_picos_principales[1]+1]
+            return int(np.argmin(region) + dos_picos_principales[0])
+        return UmbralesHistograma.otsu(histograma)
+    
+    @staticmethod
+    def _particion_optima(puntuacion: np.ndarray, n_umbrales: int) -> List[int]:
+        """
+        Divide los niveles en n_umbrales + 1 clases maximizando la suma de puntuaciones.
+        
+        Programación dinámica: mejor[b] tras m pasos es la mejor puntuación al
+        dividir los niveles [0, b) en m + 1 clases.
+        
+        Args:
+            puntuacion: Matriz (L+1, L+1) con la puntuación de cada intervalo [a, b) (-inf = no válido)
+            n_umbrales: Número de umbrales
+        
+        Returns:
+            Lista ordenada de umbrales (primer nivel de cada clase)
+        """
+        n = puntuacion.shape[0] - 1
+        indices = np.arange(n + 1)
+        puntuacion = np.where(indices[:, None] < indices[None, :], puntuacion, -np.inf)
+        
+        mejor = puntuacion[0].copy()
+        origen = np.zeros((n_umbrales, n + 1), dtype=np.intp)
+        for m in range(n_umbrales):
+            candidatos = mejor[:, None] + puntuacion
+            origen[m] = np.argmax(candidatos, axis=0)
+            mejor = candidatos[origen[m], indices]
+        
+        if not np.isfinite(mejor[n]):
+            # Menos niveles ocupados que clases pedidas: umbrales equiespaciados
+            return [int(u) for u in np.linspace(0, n, n_umbrales + 2)[1:-1]]
+        
+        umbrales = []
+        b = n
+        for m in range(n_umbrales - 1, -1, -1):
+            b = int(origen[m, b])
+            umbrales.append(b)
+        return umbrales[::-1]
+    
+    @staticmethod
+    def _validar_umbrales(n_umbrales: int):
+        """Comprueba que el número de umbrales es utilizable con 256 niveles."""
+        if not 1 <= n_umbrales <= 255:
+            raise ValueError(f'Número de umbrales no válido: {n_umbrales}')
+    
+    @staticmethod
+    def otsu_multinivel(histograma: np.ndarray, n_umbrales: int = 2) -> List[int]:
+        """
+        Umbrales de Otsu multinivel.
+        
+        Maximizar la varianza entre clases equivale a maximizar Σ M_c² / W_c,
+        con W_c y M_c el peso y el primer momento de cada clase, que se leen
+        de las tablas acumuladas para cualquier intervalo.
+        
+        Args:
+            histograma: Histograma de 256 niveles
+            n_umbrales: Número de umbrales (clases - 1)
+        
+        Returns:
+            Lista ordenada de umbrales (primer nivel de cada clase)
+        """
+        UmbralesHistograma._validar_umbrales(n_umbrales)
+        C, P, M, _ = UmbralesHistograma._tablas(histograma)
+        
+        W = P[None, :] - P[:, None]
+        Mc = M[None, :] - M[:, None]
+        validos = (C[None, :] - C[:, None]) > 0
+        puntuacion = np.full(W.shape, -np.inf)
+        np.divide(Mc**2, W, out=puntuacion, where=validos)
+        
+        return UmbralesHistograma._particion_optima(puntuacion, n_umbrales)
+    
+    @staticmethod
+    def kapur_multinivel(histograma: np.ndarray, n_umbrales: int = 2) -> List[int]:
+        """
+        Umbrales que maximizan la suma de entropías de Kapur de las clases.
+        
+        Args:
+            histograma: Histograma de 256 niveles
+            n_umbrales: Número de umbrales (clases - 1)
+        
+        Returns:
+            Lista ordenada de umbrales (primer nivel de cada clase)
+        """
+        UmbralesHistograma._validar_umbrales(n_umbrales)
+        C, P, _, S = UmbralesHistograma._tablas(histograma)
+        
+        indices = np.arange(len(C))
+        puntuacion = UmbralesHistograma._entropia_intervalos(C, P, S, indices[:, None], indices[None, :])
+        
+        return UmbralesHistograma._particion_optima(puntuacion, n_umbrales)
+    
+    @staticmethod
+    def umbral(histograma: np.ndarray, metodo: str = 'otsu') -> Union[float, np.ndarray]:
+        """
+        Calcula el umbral de un método sobre uno o varios histogramas.
+        
+        Args:
+            histograma: Histograma (256,) o pila de histogramas (N, 256)
+            metodo: 'otsu', 'kapur', 'media' o 'minimo'
+        
+        Returns:
+            Umbral (o array de N umbrales)
+        """
+        if metodo not in UmbralesHistograma.METODOS:
+            raise ValueError(f'Método de umbral desconocido: {metodo}')
+        return getattr(UmbralesHistograma, metodo)(histograma)
+    
+    @staticmethod
+    def binarizar(imagen: np.ndarray, umbral: float, metodo: str = 'otsu',
+                  dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Binariza una imagen en escala de grises con la comparación del método.
+        
+        Args:
+            imagen: Imagen en escala de grises
+            umbral: Umbral calculado por el método
+            metodo: 'otsu', 'kapur', 'media' o 'minimo'
+            dst: Array uint8 donde escribir (None = se reserva)
+        
+        Returns:
+            Imagen uint8 con 255 en el objeto y 0 en el fondo
+        """
+        inclusivo = metodo in UmbralesHistograma.INCLUSIVOS
+        
+        if imagen.dtype == np.uint8:
+            # THRESH_BINARY marca nivel > umbral; con enteros, nivel >= t equivale a nivel > ceil(t) - 1
+            if inclusivo:
+                umbral = np.ceil(umbral) - 1
+            _, resultado = cv2.threshold(imagen, float(umbral), 255, cv2.THRESH_BINARY, dst=dst)
+            return resultado
+        
+        mascara = imagen >= umbral if inclusivo else imagen > umbral
+        if dst is None:
+            return mascara.astype(np.uint8) * 255
+        np.multiply(mascara, 255, out=dst, casting='unsafe')
+        return dst
+    
+    @staticmethod
+    def umbrales_lote(imagenes: Union[np.ndarray, Iterable[np.ndarray]], metodo: str = 'otsu',
+                      n_umbrales: int = 1) -> np.ndarray:
+        """
+        Calcula umbrales para una pila (N, H, W) o un iterable de imágenes.
+        
+        Args:
+            imagenes: Pila o iterable de imágenes
+            metodo: 'otsu', 'kapur', 'media' o 'minimo'; con n_umbrales > 1, 'otsu' o 'kapur'
+            n_umbrales: Número de umbrales por imagen
+        
+        Returns:
+            Array (N,) de umbrales, o (N, n_umbrales) si n_umbrales > 1
+        """
+        histogramas = UmbralesHistograma.histogramas(imagenes)
+        if n_umbrales == 1:
+            return np.asarray(UmbralesHistograma.umbral(histogramas, metodo))
+        
+        if metodo == 'otsu':
+            funcion = UmbralesHistograma.otsu_multinivel
+        elif metodo == 'kapur':
+            funcion = UmbralesHistograma.kapur_multinivel
+        else:
+            raise ValueError(f'Método multinivel desconocido: {metodo}')
+        return np.array([funcion(h, n_umbrales) for h in histogramas], dtype=np.int64).reshape(-1, n_umbrales)
+    
+    @staticmethod
+    def todos(histograma: np.ndarray, n_umbrales: int = 2) -> Dict[str, Union[float, List[int]]]:
+        """
+        Calcula todos los umbrales disponibles a partir de un mismo histograma.
+        
+        Args:
+            histograma: Histograma de 256 niveles
+            n_umbrales: Número de umbrales para los métodos multinivel
+        
+        Returns:
+            Diccionario método -> umbral (o lista de umbrales)
+        """
+        return {
+            'otsu': UmbralesHistograma.otsu(histograma),
+            'kapur': UmbralesHistograma.kapur(histograma),
+            'media': UmbralesHistograma.media(histograma),
+            'minimo': UmbralesHistograma.minimo(histograma),
+            'otsu_multinivel': UmbralesHistograma.otsu_multinivel(histograma, n_umbrales),
+            'kapur_multinivel': UmbralesHistograma.kapur_multinivel(histograma, n_umbrales)
+        }
@@ -4,7 +4,9 @@ Módulo de umbralización para binarización de imágenes
 
 import cv2
 import numpy as np
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Tuple, Union
+from .umbrales_histograma import UmbralesHistograma
 
 
 class Umbralizacion:
@@ -71,7 +73,25 @@ class Umbralizacion:
             Tupla (imagen_binarizada, umbral_utilizado)
         """
         imagen = Umbralizacion._convertir_a_gris(imagen)
-        umbral, resultado = cv2.threshold(imagen, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        umbral = UmbralesHistograma.otsu(UmbralesHistograma.histograma(imagen))
+        _, resultado = cv2.threshold(imagen, umbral, 255, cv2.THRESH_BINARY)
+        return resultado, float(umbral)
+    
+    @staticmethod
+    def umbral_automatico(imagen: np.ndarray, metodo: str = 'otsu') -> Tuple[np.ndarray, float]:
+        """
+        Aplica umbralización con un umbral calculado sobre el histograma.
+        
+        Args:
+            imagen: Imagen de entrada
+            metodo: 'otsu', 'kapur', 'media' o 'minimo'
+        
+        Returns:
+            Tupla (imagen_binarizada, umbral_utilizado)
+        """
+        imagen = Umbralizacion._convertir_a_gris(imagen)
+        umbral = UmbralesHistograma.umbral(UmbralesHistograma.histograma(imagen), metodo)
+        resultado = UmbralesHistograma.binarizar(imagen, umbral, metodo)
         return resultado, float(umbral)
     
     @staticmethod
@@ -137,3 +157,115 @@ class Umbralizacion:
         imagen = Umbralizacion._convertir_a_gris(imagen)
         _, resultado = cv2.threshold(imagen, umbral, 255, cv2.THRESH_TOZERO_INV)
         return resultado
+    
+    @staticmethod
+    def _umbralizar_frame(frame: np.ndarray, destino: np.ndarray, metodo: str, umbral: int,
+                          block_size: int, C: int) -> float:
+        """Umbraliza un frame escribiendo en destino y devuelve el umbral usado."""
+        gris = Umbralizacion._convertir_a_gris(frame)
+        
+        if metodo == 'fijo':
+            cv2.threshold(gris, umbral, 255, cv2.THRESH_BINARY, dst=destino)
+            return float(umbral)
+        if metodo == 'otsu':
+            valor, _ = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=destino)
+            return float(valor)
+        if metodo == 'adaptativo':
+            cv2.adaptiveThreshold(gris, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                  block_size, C, dst=destino)
+            return float('nan')
+        
+        valor = UmbralesHistograma.umbral(UmbralesHistograma.histograma(gris), metodo)
+        UmbralesHistograma.binarizar(gris, valor, metodo, dst=destino)
+        return float(valor)
+    
+    @staticmethod
+    def umbralizar_lote(imagenes: Union[np.ndarray, Iterable[np.ndarray]], metodo: str = 'otsu',
+                        umbral: int = 127, block_size: int = 11, C: int = 2,
+                        salida: Optional[np.ndarray] = None, n_frames: Optional[int] = None,
+                        max_workers: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Umbraliza una pila de frames del mismo tamaño.
+        
+        Cada frame se escribe directamente en su plano de una pila de salida
+        reservada de antemano. Las funciones de cv2 liberan el GIL, así que
+        con max_workers > 1 los frames se procesan en paralelo con hilos. Con
+        un generador solo se mantienen en vuelo unos pocos frames a la vez.
+        
+        Args:
+            imagenes: Pila (N, H, W), lista o generador de frames (gris o BGR)
+            metodo: 'fijo', 'otsu', 'adaptativo', 'kapur', 'media' o 'minimo'
+            umbral: Umbral para el método fijo
+            block_size: Tamaño del bloque para el método adaptativo (impar)
+            C: Constante del método adaptativo
+            salida: Pila uint8 (N, H, W) donde escribir (None = se reserva); si
+                    llegan más frames de los que caben se lanza ValueError
+            n_frames: Número de frames de un generador, para reservar la salida
+                      (None = se amplía a medida que llegan frames si no se pasa salida)
+            max_workers: Hilos (None o 1 = secuencial)
+        
+        Returns:
+            Tupla (pila binarizada (N, H, W), umbrales por frame (N,); NaN en el adaptativo)
+        """
+        if metodo not in ('fijo', 'otsu', 'adaptativo') + UmbralesHistograma.METODOS:
+            raise ValueError(f'Método de umbralización desconocido: {metodo}')
+        if block_size % 2 == 0:
+            block_size += 1
+        
+        iterador = iter(imagenes)
+        primero = next(iterador, None)
+        if primero is None:
+            return (salida if salida is not None else np.zeros((0, 0, 0), np.uint8)), np.zeros(0)
+        forma = primero.shape[:2]
+        
+        # Solo se amplía una salida reservada aquí; la del llamador nunca se sustituye
+        ampliable = salida is None and n_frames is None and not hasattr(imagenes, '__len__')
+        if salida is None:
+            if n_frames is None and hasattr(imagenes, '__len__'):
+                n_frames = len(imagenes)
+            salida = np.empty((n_frames or 1,) + forma, dtype=np.uint8)
+        umbrales = np.full(len(salida), np.nan)
+        
+        def frames():
+            yield primero
+            yield from iterador
+        
+        def asegurar_capacidad(i):
+            nonlocal salida, umbrales
+            if i >= len(salida):
+                if not ampliable:
+                    raise ValueError(f'Se recibieron más de {len(salida)} frames')
+                # Generador sin longitud conocida: duplicar la capacidad
+                salida = np.concatenate((salida, np.empty_like(salida)))
+                umbrales = np.concatenate((umbrales, np.full(len(umbrales), np.nan)))
+        
+        def procesar(i, frame):
+            if frame.shape[:2] != forma:
+                raise ValueError(f'Forma de frame {frame.shape[:2]} distinta a la del lote {forma}')
+            return Umbralizacion._umbralizar_frame(frame, salida[i], metodo, umbral, block_size, C)
+        
+        total = 0
+        if max_workers is not None and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                en_vuelo = {}
+                for i, frame in enumerate(frames()):
+                    if i >= len(salida):
+                        # Esperar a los frames pendientes antes de reubicar la salida
+                        for j, futuro in en_vuelo.items():
+                            umbrales[j] = futuro.result()
+                        en_vuelo.clear()
+                        asegurar_capacidad(i)
+                    en_vuelo[i] = executor.submit(procesar, i, frame)
+                    if len(en_vuelo) >= 2 * max_workers:
+                        j = min(en_vuelo)
+                        umbrales[j] = en_vuelo.pop(j).result()
+                    total = i + 1
+                for j, futuro in en_vuelo.items():
+                    umbrales[j] = futuro.result()
+        else:
+            for i, frame in enumerate(frames()):
+                asegurar_capacidad(i)
+                umbrales[i] = procesar(i, frame)
+                total = i + 1
+        
+        return salida[:total], umbrales[:total]
@@ -4,5 +4,7 @@ Módulo de utilidades
 
 from .carga_imagenes import CargadorImagenes
 from .analizador_canales import AnalizadorCanales
+from .metricas_calidad import MetricasCalidad
+from .cache_lru import CacheLRU
 
-__all__ = ['CargadorImagenes', 'AnalizadorCanales']
+__all__ = ['CargadorImagenes', 'AnalizadorCanales', 'MetricasCalidad', 'CacheLRU']
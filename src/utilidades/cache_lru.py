@@ -0,0 +1,125 @@
+"""
+Módulo de caché LRU limitada por memoria
+"""
+
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Caché LRU con límite de bytes y contadores de aciertos/fallos.
+    
+    Pensada para reutilizar arrays derivados de parámetros (máscaras, tablas
+    de búsqueda, mallas de distancia) entre llamadas. Los arrays almacenados
+    se marcan como de solo lectura para que ningún llamador pueda alterar
+    el valor compartido.
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 1024**2, max_elementos: Optional[int] = None):
+        """
+        Inicializa la caché.
+        
+        Args:
+            max_bytes: Tamaño máximo total de los valores almacenados
+            max_elementos: Número máximo de entradas (None = sin límite)
+        """
+        self.max_bytes = max_bytes
+        self.max_elementos = max_elementos
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+    
+    @staticmethod
+    def _tamano(valor: Any) -> int:
+        """Estima los bytes ocupados por un valor (arrays, tuplas de arrays u objetos con nbytes)."""
+        if isinstance(valor, (tuple, list)):
+            return sum(CacheLRU._tamano(v) for v in valor)
+        return int(getattr(valor, 'nbytes', 0))
+    
+    @staticmethod
+    def _congelar(valor: Any) -> Any:
+        """Marca como solo lectura los arrays del valor."""
+        if isinstance(valor, np.ndarray):
+            valor.flags.writeable = False
+        elif isinstance(valor, (tuple, list)):
+            for v in valor:
+                CacheLRU._congelar(v)
+        return valor
+    
+    def obtener(self, clave: Hashable, crear: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor asociado a la clave, creándolo si no existe.
+        
+        Args:
+            clave: Clave hashable que identifica el valor
+            crear: Función sin argumentos que construye el valor
+        
+        Returns:
+            Valor almacenado en caché
+        """
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave][0]
+            self.fallos += 1
+        
+        # Construir fuera del lock para no serializar el cálculo
+        valor = self._congelar(crear())
+        tamano = self._tamano(valor)
+        
+        with self._lock:
+            if clave in self._datos:
+                return self._datos[clave][0]
+            if tamano > self.max_bytes:
+                return valor
+            
+            self._datos[clave] = (valor, tamano)
+            self._bytes += tamano
+            self._expulsar()
+        
+        return valor
+    
+    def _expulsar(self):
+        """Elimina las entradas menos usadas hasta respetar los límites."""
+        while self._datos and (self._bytes > self.max_bytes or
+                               (self.max_elementos is not None and len(self._datos) > self.max_elementos)):
+            _, (_, tamano) = self._datos.popitem(last=False)
+            self._bytes -= tamano
+    
+    def redimensionar(self, max_bytes: int):
+        """Cambia el límite de bytes y expulsa entradas si es necesario."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._expulsar()
+    
+    def limpiar(self):
+        """Vacía la caché y reinicia los contadores."""
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+            self.aciertos = 0
+            self.fallos = 0
+    
+    def estadisticas(self) -> Dict[str, float]:
+        """
+        Devuelve el estado de la caché.
+        
+        Returns:
+            Diccionario con aciertos, fallos, tasa de aciertos, entradas y bytes
+        """
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'elementos': len(self._datos),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
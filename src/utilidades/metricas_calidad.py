@@ -0,0 +1,149 @@
+"""
+Módulo de métricas de calidad de imagen
+Implementa MSE, PSNR y SSIM con ventana local
+"""
+
+import cv2
+import math
+import numpy as np
+from scipy import ndimage
+from typing import Optional, Tuple, Union
+
+
+class MetricasCalidad:
+    """Clase con métricas de calidad entre una imagen de referencia y otra procesada."""
+    
+    @staticmethod
+    def _rango_dinamico(imagen: np.ndarray, rango: Optional[float]) -> float:
+        """Obtiene el rango dinámico: 255 para uint8, 1.0 para imágenes normalizadas."""
+        if rango is not None:
+            return float(rango)
+        return 255.0 if imagen.dtype == np.uint8 else 1.0
+    
+    @staticmethod
+    def mse(img1: np.ndarray, img2: np.ndarray) -> float:
+        """Calcula el error cuadrático medio entre dos imágenes."""
+        if img1.dtype == np.uint8:
+            img1 = img1.astype(np.float32)
+        if img2.dtype == np.uint8:
+            img2 = img2.astype(np.float32)
+        return np.mean((img1 - img2)**2)
+    
+    @staticmethod
+    def psnr(img1: np.ndarray, img2: np.ndarray, rango: Optional[float] = None) -> float:
+        """
+        Calcula la relación señal a ruido de pico (PSNR) en dB.
+        
+        Args:
+            img1: Imagen de referencia
+            img2: Imagen a evaluar
+            rango: Valor máximo de la señal (None = según dtype)
+        
+        Returns:
+            PSNR en dB (inf si las imágenes son idénticas)
+        """
+        L = MetricasCalidad._rango_dinamico(img1, rango)
+        mse = MetricasCalidad.mse(img1, img2)
+        return 20 * math.log10(L) - 10 * math.log10(mse) if mse > 0 else float('inf')
+    
+    @staticmethod
+    def _filtro_local(img: np.ndarray, ventana: str, tamano: int, sigma: float, backend: str) -> np.ndarray:
+        """Promedio local separable (gaussiano o de caja) sobre los ejes espaciales."""
+        if backend == 'cv2':
+            if ventana == 'gaussiana':
+                return cv2.GaussianBlur(img, (tamano, tamano), sigma, borderType=cv2.BORDER_REFLECT)
+            return cv2.blur(img, (tamano, tamano), borderType=cv2.BORDER_REFLECT)
+        
+        espacial = (1,) * (img.ndim - 2)
+        if ventana == 'gaussiana':
+            radio = tamano // 2
+            sigmas = (sigma, sigma) + (0,) * len(espacial)
+            return ndimage.gaussian_filter(img, sigmas, mode='reflect', truncate=radio / sigma)
+        return ndimage.uniform_filter(img, (tamano, tamano) + espacial, mode='reflect')
+    
+    @staticmethod
+    def ssim(img1: np.ndarray, img2: np.ndarray, rango: Optional[float] = None,
+             ventana: str = 'gaussiana', tamano: int = 11, sigma: float = 1.5,
+             backend: str = 'cv2', devolver_mapa: bool = False) -> Union[float, Tuple[float, np.ndarray]]:
+        """
+        Calcula SSIM (Structural Similarity Index) con ventana local.
+        
+        Las medias, varianzas y covarianza locales se obtienen con filtros
+        separables en float32, por lo que el coste es lineal en el número de
+        píxeles. Para imágenes a color se promedia sobre todos los canales.
+        
+        Args:
+            img1: Imagen de referencia
+            img2: Imagen a evaluar (misma forma)
+            rango: Valor máximo de la señal (None = 255 para uint8, 1.0 en otro caso)
+            ventana: 'gaussiana' o 'uniforme'
+            tamano: Lado de la ventana (impar, típicamente 11)
+            sigma: Desviación de la ventana gaussiana
+            backend: 'cv2' o 'scipy'
+            devolver_mapa: Si además se devuelve el mapa SSIM por píxel
+        
+        Returns:
+            SSIM medio, o tupla (ssim_medio, mapa_ssim) si devolver_mapa=True
+        """
+        if img1.shape != img2.shape:
+            raise ValueError('Las imágenes deben tener la misma forma')
+        if ventana not in ('gaussiana', 'uniforme'):
+            raise ValueError(f'Ventana desconocida: {ventana}')
+        if backend not in ('cv2', 'scipy'):
+            raise ValueError(f'Backend desconocido: {backend}')
+        if tamano % 2 == 0:
+            tamano += 1
+        
+        L = MetricasCalidad._rango_dinamico(img1, rango)
+        C1 = (0.01 * L)**2
+        C2 = (0.03 * L)**2
+        
+        x = img1.astype(np.float32, copy=False)
+        y = img2.astype(np.float32, copy=False)
+        
+        def filtrar(img):
+            return MetricasCalidad._filtro_local(img, ventana, tamano, sigma, backend)
+        
+        mu1 = filtrar(x)
+        mu2 = filtrar(y)
+        sigma1_sq = filtrar(x * x)
+        sigma2_sq = filtrar(y * y)
+        sigma12 = filtrar(x * y)
+        
+        # Operaciones in situ para no crear temporales del tamaño de la imagen
+        mu12 = mu1 * mu2
+        mu1 *= mu1
+        mu2 *= mu2
+        sigma1_sq -= mu1
+        sigma2_sq -= mu2
+        sigma12 -= mu12
+        
+        # Numerador: (2*mu12 + C1) * (2*sigma12 + C2)
+        mu12 *= 2
+        mu12 += C1
+        sigma12 *= 2
+        sigma12 += C2
+        mu12 *= sigma12
+        
+        # Denominador: (mu1^2 + mu2^2 + C1) * (sigma1^2 + sigma2^2 + C2)
+        mu1 += mu2
+        mu1 += C1
+        sigma1_sq += sigma2_sq
+        sigma1_sq += C2
+        mu1 *= sigma1_sq
+        
+        mu12 /= mu1
+        mapa = mu12
+        
+        # Excluir el borde afectado por el relleno de la ventana
+        pad = tamano // 2
+        h, w = mapa.shape[:2]
+        if h > 2 * pad and w > 2 * pad:
+            mapa_valido = mapa[pad:h - pad, pad:w - pad]
+        else:
+            mapa_valido = mapa
+        valor = float(np.mean(mapa_valido, dtype=np.float64))
+        
+        if devolver_mapa:
+            return valor, mapa
+        return valor